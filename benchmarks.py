@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+'''
+    Performance benchmarks. Run with `python benchmarks.py <name>`.
+'''
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY_MODULES = ('InquirerPy', 'rich', 'yaspin', 'prompt_toolkit', 'webbrowser', 'mimetypes')
+
+
+def write_tasks(file_path, count):
+    with open(file_path, 'w') as file:
+        for index in range(count):
+            file.write(f"{'[x]' if index % 3 == 0 else '[ ]'} task {index} @tag{index % 7}\n")
+
+
+def make_workspace(directory, projects=1, tasks=10):
+    config = {
+        'root_folder': directory, 'parent_folder_name': 'TODOs', 'file_format': 'txt', 'theme': 'vesper'
+    }
+
+    with open(os.path.join(directory, 'config.json'), 'w') as file:
+        json.dump(config, file)
+
+    for project in range(projects):
+        project_folder = os.path.join(directory, 'TODOs', f'project-{project}')
+        os.makedirs(project_folder, exist_ok=True)
+
+        write_tasks(os.path.join(project_folder, 'todos.txt'), tasks)
+
+
+def bench_startup(args):
+    '''
+        Cold start of headless commands must stay under the budget and must
+        not pull in any of the interactive modules.
+    '''
+    commands = [['list', 'project-0'], ['report'], ['add', 'project-0', 'benchmark task']]
+
+    with tempfile.TemporaryDirectory() as directory:
+        make_workspace(directory)
+
+        failed = False
+        for command in commands:
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, os.path.join(HERE, 'todoscript.py'), *command],
+                               cwd=directory, check=True, stdout=subprocess.DEVNULL)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            median = statistics.median(timings)
+            status = 'ok' if median <= args.budget else 'OVER BUDGET'
+            failed = failed or median > args.budget
+            print(f"{' '.join(command):<30} median {median:7.1f}ms  budget {args.budget}ms  {status}")
+
+        probe = (f"import sys; sys.path.insert(0, {HERE!r}); import todoscript; "
+                 "todoscript.main(['list', 'project-0']); "
+                 f"print('loaded:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', probe], cwd=directory,
+                                check=True, capture_output=True, text=True)
+        loaded = result.stdout.splitlines()[-1][len('loaded:'):]
+
+        if loaded:
+            failed = True
+            print(f"interactive modules imported by a headless command: {loaded}")
+
+    return 1 if failed else 0
+
+
+def bench_toggle(args):
+    '''
+        Status toggle latency: in-place byte patch vs the full-file rewrite.
+    '''
+    import store
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'todos.txt')
+            write_tasks(file_path, size)
+            store.get_store(file_path)
+
+            line_numbers = [1, size // 2, size]
+            record = {'op': 'status', 'lines': line_numbers, 'status': '[ ]'}
+
+            timings = {'patch': [], 'rewrite': []}
+            for run in range(args.runs):
+                start = time.perf_counter()
+                store.patch_status(file_path, line_numbers, run % 2 == 0)
+                timings['patch'].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                store.apply(file_path, {**record, 'status': '[x]' if run % 2 else '[ ]'})
+                timings['rewrite'].append(time.perf_counter() - start)
+
+                # the rewrite invalidates the cached offsets
+                store.get_store(file_path)
+
+            patch = statistics.median(timings['patch']) * 1000
+            rewrite = statistics.median(timings['rewrite']) * 1000
+            print(f"{size:>9} lines  patch {patch:9.3f}ms  rewrite {rewrite:9.3f}ms  "
+                  f"speedup {rewrite / patch if patch else float('inf'):8.1f}x")
+
+    return 0
+
+
+def bench_formats(args):
+    '''
+        Parse and write throughput for every storage format.
+    '''
+    import formats
+
+    for size in args.sizes:
+        lines = [f"{'[x]' if index % 3 == 0 else '[ ]'} task {index} @tag{index % 7}"
+                 for index in range(size)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name in sorted(formats.WRITERS):
+                file_path = os.path.join(directory, f'todos.{name}')
+
+                timings = {'parse': [], 'write': []}
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    formats.write_lines(file_path, lines)
+                    timings['write'].append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    parsed = sum(1 for _ in formats.read_lines(file_path))
+                    timings['parse'].append(time.perf_counter() - start)
+
+                assert parsed == size
+                megabytes = os.path.getsize(file_path) / (1024 * 1024)
+                parse = statistics.median(timings['parse'])
+                write = statistics.median(timings['write'])
+
+                print(f"{size:>9} tasks  {name:<5} "
+                      f"parse {size / parse:12,.0f} tasks/s {megabytes / parse:8.1f} MB/s  "
+                      f"write {size / write:12,.0f} tasks/s {megabytes / write:8.1f} MB/s")
+
+    return 0
+
+
+def bench_export(args):
+    '''
+        Single-pass export of every format at once: throughput and peak
+        memory, which should not grow with the number of tasks.
+    '''
+    import exporter
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'todos.txt')
+            write_tasks(file_path, size)
+
+            export_formats = sorted(exporter.WRITERS)
+            output_folder = os.path.join(directory, 'exports')
+
+            start = time.perf_counter()
+            paths = exporter.export_project(file_path, 'benchmark', export_formats, output_folder)
+            elapsed = time.perf_counter() - start
+
+            # a second run under tracemalloc, which slows everything down
+            gc.collect()
+            tracemalloc.start()
+            exporter.export_project(file_path, 'benchmark', export_formats, output_folder)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            written = sum(os.path.getsize(path) for path in paths.values())
+            print(f"{size:>9} tasks  {len(paths)} formats  {size / elapsed:10,.0f} tasks/s  "
+                  f"{written / 1024 / 1024 / elapsed:7.1f} MB/s written  peak {peak / 1024:8.1f} KiB")
+
+    return 0
+
+
+def bench_discovery(args):
+    '''
+        Project discovery over three roots of nested folders: a cold scan and
+        warm rescans that should only stat the cached folders.
+    '''
+    import discovery
+
+    with tempfile.TemporaryDirectory() as directory:
+        roots = [os.path.join(directory, f'root-{root}') for root in range(3)]
+        per_root = max(1, args.directories // len(roots))
+
+        # root/group/team/project: about 30 groups of 10 teams per root
+        for root in roots:
+            for index in range(per_root):
+                project = os.path.join(root, f'group-{index // 100}', f'team-{index // 10 % 10}', f'project-{index}')
+                os.makedirs(project)
+                if index % 2 == 0:
+                    open(os.path.join(project, 'pyproject.toml'), 'w').close()
+
+        config = {
+            'root_folder': roots[0], 'roots': roots, 'parent_folder_name': os.path.join(directory, 'TODOs'),
+            'discovery_depth': 3, 'project_markers': ['pyproject.toml'],
+        }
+
+        start = time.perf_counter()
+        projects = discovery.discover(config)
+        cold = time.perf_counter() - start
+
+        discovery._cache.clear()
+        start = time.perf_counter()
+        discovery.discover(config)
+        warm_disk = time.perf_counter() - start
+
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            discovery.discover(config)
+            timings.append(time.perf_counter() - start)
+        warm = statistics.median(timings) * 1000
+
+        print(f"{len(projects)} projects in {len(roots)} roots: cold {cold * 1000:.1f} ms, "
+              f"warm from disk {warm_disk * 1000:.1f} ms, warm {warm:.1f} ms (budget {args.budget:.0f} ms)")
+
+    return 0 if warm <= args.budget else 1
+
+
+def bench_report_export(args):
+    '''
+        Peak memory and time of the html/svg report export for large tables:
+        rich's recorded export_html vs the streaming html writer.
+    '''
+    os.environ['TODOSCRIPT_FAST'] = '1'
+    sys.path.insert(0, HERE)
+    import utils
+
+    reports_data = [{'id': index + 1, 'project': f'project-{index}', 'completed_tasks': index % 11,
+                     'pending_tasks': 10 - index % 11, 'total_tasks': 10} for index in range(args.rows)]
+
+    cases = [('html (rich)', ['html'], args.rows), ('html (streamed)', ['html'], 0), ('svg', ['svg'], 0)]
+
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, 'w') as devnull:
+        os.chdir(directory)
+        stdout = sys.stdout
+
+        for label, formats, stream_rows in cases:
+            utils.STREAM_HTML_ROWS = stream_rows
+
+            gc.collect()
+            tracemalloc.start()
+            start = time.perf_counter()
+            sys.stdout = devnull
+            try:
+                utils.write_reports(reports_data, None, formats)
+            finally:
+                sys.stdout = stdout
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            size = os.path.getsize(os.path.join('reports', f'reports_table.{formats[0]}'))
+            print(f"{args.rows:>7} rows  {label:<16} peak {peak / 1024 / 1024:8.1f} MiB  "
+                  f"{elapsed:7.2f}s  output {size / 1024 / 1024:6.1f} MiB")
+
+        os.chdir(HERE)
+
+    return 0
+
+
+class ScriptedPrompt:
+    def __init__(self, answer):
+        self.answer = answer
+
+    def execute(self):
+        return self.answer
+
+
+class ScriptedInquirer:
+    '''
+        Stands in for InquirerPy's inquirer, answering every prompt from a
+        repeating script.
+    '''
+
+    def __init__(self, answers):
+        self.answers = itertools.cycle(answers)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: ScriptedPrompt(next(self.answers))
+
+
+# main menu -> project -> next page -> complete 1,2 -> reopen 1,2 -> main
+# menu -> reports -> main menu, one answer per prompt
+SOAK_SCRIPT = [1, 'project-0', 8, 0, '1,2', 1, 0, '1,2', 2, 6, 4, 0]
+
+
+class SoakFinished(Exception):
+    pass
+
+
+def frame_depth():
+    depth = 0
+    frame = sys._getframe()
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+def bench_soak(args):
+    '''
+        Drives the interactive menus through --navigations scripted screens
+        and checks that memory and stack depth stay flat.
+    '''
+    os.environ['TODOSCRIPT_FAST'] = '1'
+
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, 'w') as devnull:
+        make_workspace(directory, projects=3, tasks=100)
+        os.chdir(directory)
+
+        with open('config.json') as file:
+            config = json.load(file)
+        with open('config.json', 'w') as file:
+            json.dump({**config, 'page_size': 10}, file)
+
+        sys.path.insert(0, HERE)
+        import cli
+        from rich.console import Console
+
+        cli.inquirer = ScriptedInquirer(SOAK_SCRIPT)
+        cli.console = Console(file=devnull)
+
+        checkpoint = max(1, args.navigations // 10)
+        samples = []
+        navigations = 0
+
+        def clear_terminal():
+            nonlocal navigations
+            navigations += 1
+
+            if navigations % checkpoint == 0:
+                gc.collect()
+                samples.append((navigations, tracemalloc.get_traced_memory()[0], frame_depth()))
+            if navigations >= args.navigations:
+                raise SoakFinished()
+
+        cli.clear_terminal = clear_terminal
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            cli.main()
+        except SoakFinished:
+            pass
+        finally:
+            sys.stdout = stdout
+            tracemalloc.stop()
+        elapsed = time.perf_counter() - start
+
+        os.chdir(HERE)
+
+    for count, memory, depth in samples:
+        print(f"{count:>9} navigations  {memory / 1024:10.1f} KiB  stack depth {depth}")
+
+    # the first sample still includes one-off caches warming up
+    baseline = samples[1] if len(samples) > 2 else samples[0]
+    growth = samples[-1][1] - baseline[1]
+    flat = growth <= max(256 * 1024, baseline[1] * 0.05) and samples[-1][2] == baseline[2]
+
+    print(f"{navigations} navigations in {elapsed:.1f}s, memory growth {growth / 1024:.1f} KiB "
+          f"since {baseline[0]}: {'flat' if flat else 'GROWING'}")
+
+    return 0 if flat else 1
+
+
+BENCHMARKS = {
+    'discovery': bench_discovery,
+    'export': bench_export,
+    'formats': bench_formats,
+    'report-export': bench_report_export,
+    'soak': bench_soak,
+    'startup': bench_startup,
+    'toggle': bench_toggle,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='todoscript benchmarks')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=100,
+                        help='time budget in milliseconds')
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')],
+                        default=[1000, 100000, 1000000], help='comma-separated task counts')
+    parser.add_argument('--rows', type=int, default=10000,
+                        help='report rows for the report-export benchmark')
+    parser.add_argument('--directories', type=int, default=10000,
+                        help='project folders for the discovery benchmark')
+    parser.add_argument('--navigations', type=int, default=10000,
+                        help='scripted screens for the soak benchmark')
+    args = parser.parse_args(argv)
+
+    return BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,28 +2,33 @@
 
 from InquirerPy import inquirer, prompt, get_style
 from InquirerPy.validator import NumberValidator, EmptyInputValidator
-from rich.table import Table
 from rich.console import Console
 from rich.prompt import Prompt
-from rich.text import Text
 from InquirerPy.prompts.expand import ExpandChoice
 
-import time
-from yaspin import yaspin
 from InquirerPy.validator import PathValidator
 from InquirerPy.base.control import Choice
 from InquirerPy.separator import Separator
 
 import os
 import mimetypes
-import tempfile
 import webbrowser
 import subprocess
-import re
 
 from main import configure, create_tasks, get_folders
-from utils import open_file, has_been_configured, export_tasks, clear_terminal, linebreak, get_configuration, generate_reports
+from utils import open_file, has_been_configured, clear_terminal, linebreak, get_configuration, generate_reports, pause, spinner, timed
 from constants import file_formats, themes, main_menu_options
+from store import get_store, find_tasks_file, list_projects, read_tasks, add_task, set_status, edit_task, add_tags, delete_tasks
+from tag_index import get_tag_index
+from search import get_search_index
+from due_index import get_due_index
+from priority_index import get_priority_index
+from query import compile_query
+from harvest import harvest
+from discovery import project_source
+from exporter import export_project, exports_folder
+from reports import collect_reports, build_table
+from pager import page_size, page_count, clamp_page, page_items, page_of_line, style_task
 custom_syles = get_style(
     {
         "questionmark": "#EB5B00 bold",
@@ -50,7 +55,25 @@ custom_syles = get_style(
 
 console = Console()
 
-config = get_configuration()
+
+# navigation
+#
+# Screens return the route to show next instead of calling it, and
+# navigate() runs them in a loop, so the call stack stays flat and each
+# screen's data is released as soon as it returns. A screen returning None
+# ends the session.
+
+
+def go(screen, *args, **kwargs):
+    return screen, args, kwargs
+
+
+def navigate(route):
+    while route is not None:
+        screen, args, kwargs = route
+        route = screen(*args, **kwargs)
+
+
 # DATA
 
 
@@ -121,7 +144,7 @@ def set_configuration():
             message="Proceed to main menu?", default=True).execute()
 
         if main_menu_confirmation:
-            main_menu()
+            return go(main_menu)
 
     else:
         console.print(
@@ -144,79 +167,56 @@ def main_menu():
     ).execute()
 
     if menu_option == 0:
-        generate_tasks()
+        return go(generate_tasks)
 
     if menu_option == 1:
-        view_projects()
+        return go(view_projects)
 
     if menu_option == 2:
-        view_configuration()
+        return go(view_configuration)
 
     if menu_option == 3:
-        update_configuration()
+        return go(update_configuration)
 
     if menu_option == 4:
-        view_reports()
+        return go(view_reports)
 
     if menu_option == 5:
         clear_terminal()
 
-        exit_app()
+        return exit_app()
 
+    if menu_option == 6:
+        return go(view_tagged_tasks)
 
-def view_reports():
+    if menu_option == 7:
+        return go(view_search)
 
-    clear_terminal()
+    if menu_option == 8:
+        from tui import run
 
-    linebreak()
-    console.print("[red bold] Reports")
-    linebreak()
+        run(get_configuration()['parent_folder_name'])
+        return go(main_menu)
 
-    all_folders = get_folders()
-
-    reports_table = Table(title="Tasks")
-
-    reports_data = []
-
-    reports_table.add_column("ID", justify="center", style="bright_cyan")
-    reports_table.add_column("Folder", justify="left", style="#e5c07b")
-    reports_table.add_column("Progress", justify="left", style="#e5c07b")
-
-    for fol_index, folder in enumerate(all_folders):
-        total_tasks = 0
-        completed_tasks = 0
-        pending_tasks = 0
-
-        with open(os.path.join(config['parent_folder_name'], folder, 'todos.txt'), 'r') as file:
-            for index, line in enumerate(file):
-                line = line.rstrip("\n")
+    if menu_option == 9:
+        return go(view_due_tasks)
 
-                if line[:3] == '[x]':
-                    completed_tasks += 1
-                if line[:3] == '[ ]':
-                    pending_tasks += 1
+    if menu_option == 10:
+        return go(view_priority_tasks)
 
-                if line[:3] == '[ ]' or line[:3] == '[x]':
-                    total_tasks += 1
 
-                percentage_complete = round(
-                    (completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0
-                bars = int(percentage_complete / 10) if total_tasks > 0 else 0
-                strokes = 10 - bars
+def view_reports():
 
-                graph = f"[{'[white]█[/white]'*bars}{'-'*strokes}]"
+    clear_terminal()
 
-                stats = f"{graph} {percentage_complete}% ({completed_tasks}/{total_tasks})"
+    linebreak()
+    console.print("[red bold] Reports")
+    linebreak()
 
-        reports_data.append({
-            'id': fol_index + 1,
-            'project': folder,
-            'completed_tasks': completed_tasks,
-            'pending_tasks': pending_tasks,
-            'total_tasks': total_tasks
-        })
+    all_folders = get_folders()
 
-        reports_table.add_row(str(fol_index + 1), folder, stats)
+    reports_data = collect_reports(all_folders, get_configuration()['parent_folder_name'])
+    reports_table = build_table(reports_data)
 
     console.print(reports_table)
 
@@ -235,7 +235,7 @@ def view_reports():
     ).execute()
 
     if selected_option == 0:
-        main_menu()
+        return go(main_menu)
 
     if selected_option == 1:
         format_options = [
@@ -276,20 +276,210 @@ def view_reports():
         ).execute()
 
         if selected_reports_option == 0:
-            view_reports()
+            return go(view_reports)
 
         if selected_reports_option == 1:
-            main_menu()
+            return go(main_menu)
 
         if selected_reports_option == 2:
             webbrowser.open("reports/reports_table.html")
-            view_reports()
+            return go(view_reports)
 
         if selected_reports_option == 3:
-            exit_app()
+            return exit_app()
 
     if selected_option == 2:
-        exit_app()
+        return exit_app()
+
+
+def view_tagged_tasks():
+    clear_terminal()
+
+    linebreak()
+    console.print("[red bold] Tasks by tag")
+    linebreak()
+
+    parent_folder = get_configuration()['parent_folder_name']
+    tag_index = get_tag_index(parent_folder)
+
+    if tag_index.tags():
+        tag = inquirer.fuzzy(
+            message='Select a tag',
+            choices=tag_index.tags(),
+            style=custom_syles,
+            pointer='>'
+        ).execute()
+
+        linebreak()
+
+        for project, lines in tag_index.project_postings(tag):
+            console.print(f" [bright_white underline]{project}")
+
+            file_path = find_tasks_file(os.path.join(parent_folder, project))
+            for task in read_tasks(file_path, lines):
+                render_task(task.raw, task.line)
+    else:
+        console.print(" [grey39]No tagged tasks yet.")
+
+    linebreak()
+
+    option = inquirer.select(
+        message='Select option',
+        style=custom_syles,
+        choices=[
+            Choice(name='Search another tag', value=0),
+            Choice(name='Return to the main menu', value=1),
+            Choice(name='Exit application', value=2)
+        ]
+    ).execute()
+
+    if option == 0:
+        return go(view_tagged_tasks)
+
+    if option == 1:
+        return go(main_menu)
+
+    if option == 2:
+        return exit_app()
+
+
+def view_search():
+    clear_terminal()
+
+    linebreak()
+    console.print("[red bold] Search tasks")
+    linebreak()
+
+    query = inquirer.text(
+        message='Search for',
+        style=custom_syles,
+        validate=EmptyInputValidator()
+    ).execute()
+
+    parent_folder = get_configuration()['parent_folder_name']
+    results = get_search_index(parent_folder).search(query)
+
+    linebreak()
+
+    if results:
+        for score, project, line, raw in results:
+            console.print(f" [grey39]{project}", end='')
+            render_task(raw, line)
+    else:
+        console.print(f" [grey39]No tasks match '{query}'.")
+
+    linebreak()
+
+    option = inquirer.select(
+        message='Select option',
+        style=custom_syles,
+        choices=[
+            Choice(name='Search again', value=0),
+            Choice(name='Return to the main menu', value=1),
+            Choice(name='Exit application', value=2)
+        ]
+    ).execute()
+
+    if option == 0:
+        return go(view_search)
+
+    if option == 1:
+        return go(main_menu)
+
+    if option == 2:
+        return exit_app()
+
+
+def view_due_tasks():
+    clear_terminal()
+
+    linebreak()
+    console.print("[red bold] Upcoming / Overdue tasks")
+    linebreak()
+
+    due_index = get_due_index(get_configuration()['parent_folder_name'])
+    limit = page_size(get_configuration())
+
+    overdue = due_index.overdue()
+    # one page in all: overdue tasks first, upcoming ones fill the rest
+    upcoming = due_index.upcoming(limit - len(overdue)) if len(overdue) < limit else []
+
+    if overdue:
+        console.print(f" [red bold]Overdue ({len(overdue)})")
+        for due, project, line, raw in overdue[:limit]:
+            console.print(f" [grey39]{project}", end='')
+            render_task(raw, line)
+        if len(overdue) > limit:
+            console.print(f" [grey39]... and {len(overdue) - limit} more")
+        linebreak()
+
+    if upcoming:
+        console.print(" [#e5c07b bold]Upcoming")
+        for due, project, line, raw in upcoming:
+            console.print(f" [grey39]{project}", end='')
+            render_task(raw, line)
+    elif not overdue:
+        console.print(" [grey39]No pending tasks have a due date. Add one with due:YYYY-MM-DD.")
+
+    linebreak()
+
+    option = inquirer.select(
+        message='Select option',
+        style=custom_syles,
+        choices=[
+            Choice(name='Refresh', value=0),
+            Choice(name='Return to the main menu', value=1),
+            Choice(name='Exit application', value=2)
+        ]
+    ).execute()
+
+    if option == 0:
+        return go(view_due_tasks)
+
+    if option == 1:
+        return go(main_menu)
+
+    if option == 2:
+        return exit_app()
+
+
+def view_priority_tasks():
+    clear_terminal()
+
+    linebreak()
+    console.print("[red bold] Top priority tasks")
+    linebreak()
+
+    priority_index = get_priority_index(get_configuration()['parent_folder_name'])
+    results = priority_index.top(page_size(get_configuration()))
+
+    if results:
+        for priority, project, line, raw in results:
+            console.print(f" [grey39]{project}", end='')
+            render_task(raw, line)
+    else:
+        console.print(" [grey39]No pending tasks have a priority. Add one with !high, !medium, !low or !1-!9.")
+
+    linebreak()
+
+    option = inquirer.select(
+        message='Select option',
+        style=custom_syles,
+        choices=[
+            Choice(name='Refresh', value=0),
+            Choice(name='Return to the main menu', value=1),
+            Choice(name='Exit application', value=2)
+        ]
+    ).execute()
+
+    if option == 0:
+        return go(view_priority_tasks)
+
+    if option == 1:
+        return go(main_menu)
+
+    if option == 2:
+        return exit_app()
 
 
 def view_configuration():
@@ -328,9 +518,9 @@ def view_configuration():
     ).execute()
 
     if option == 0:
-        main_menu()
+        return go(main_menu)
     else:
-        update_configuration()
+        return go(update_configuration)
 
 
 def update_configuration():
@@ -390,8 +580,9 @@ def update_configuration():
     linebreak()
 
     if confirm:
+        # keep optional settings such as roots and storage
         config = {
-            'root_folder': root_folder_input, 'parent_folder_name': parent_folder_name, 'file_format': file_format_input, 'theme': theme_input
+            **data, 'root_folder': root_folder_input, 'parent_folder_name': parent_folder_name, 'file_format': file_format_input, 'theme': theme_input
         }
 
         configure(config, is_editing=True)
@@ -400,7 +591,7 @@ def update_configuration():
             message="Proceed to main menu?", default=True).execute()
 
         if main_menu_confirmation:
-            main_menu()
+            return go(main_menu)
 
     else:
         console.print(
@@ -428,15 +619,15 @@ def generate_tasks():
     ).execute()
 
     if option == 0:
-        view_projects()
+        return go(view_projects)
 
     if option == 1:
-        main_menu()
+        return go(main_menu)
 
     if option == 2:
         clear_terminal()
 
-        exit_app()
+        return exit_app()
 
 
 def view_projects():
@@ -446,8 +637,8 @@ def view_projects():
     console.print("[red bold] Select Folder")
     linebreak()
 
-    folder_path = os.path.join(config['parent_folder_name'])
-    folders = os.listdir(folder_path)
+    folder_path = os.path.join(get_configuration()['parent_folder_name'])
+    folders = list_projects(folder_path)
 
     option = inquirer.fuzzy(
         message='Select a folder to view its tasks',
@@ -457,79 +648,49 @@ def view_projects():
         pointer='>'
     ).execute()
 
-    view_folder_tasks(option)
+    return go(view_folder_tasks, option)
 
 
-def view_folder_tasks(folder, prev='', tasks_filter=''):
+def view_folder_tasks(folder, prev='', tasks_filter='', page=0):
     clear_terminal()
 
-    last_index = 0
-
     linebreak()
-    all_items = 0
-    completed = 0
-    pending_tasks = 0
-
-    task_list = []
-    all_tags = []
 
     root_directory = get_configuration()['parent_folder_name']
 
     folder_path = os.path.join(root_directory, folder)
 
-    file = [f for f in os.listdir(folder_path) if os.path.isfile(
-        os.path.join(folder_path, f))][0]
-
-    file_path = os.path.join(folder_path, file)
-
-    if file.endswith("txt"):
-        with open(file_path, encoding='utf-8') as file:
-            for line in file:
-                line = line.rstrip("\n")
-                all_items += 1
-                if line[:3] == "[ ]":
-                    pending_tasks += 1
-                elif line[:3] == "[x]":
-                    completed += 1
-
-        percentage_done = round(completed/all_items *
-                                100) if all_items > 0 else 0
-        total_bars = int(percentage_done/100 * 10) if all_items > 0 else 0
-        bars = "█" * total_bars
-        strokes = "-" * (10-total_bars)
-
-        progress_bar = f' [bright_white underline]{folder} tasks[/bright_white underline] [grey39][{completed}/{all_items}] [/grey39]'
-        # Display the counts at the top before tasks
-        console.print(progress_bar)
-        linebreak()
-
-        with open(file_path, encoding='utf-8') as file:
-            for index, line in enumerate(file, start=1):
-                task_list.append(f"{line.strip()}")
+    file_path = find_tasks_file(folder_path)
 
-                last_index += 1
-                line = line.rstrip("\n")
+    store = get_store(file_path)
 
-                tags = [x for x in line.split(" ") if x.startswith("@")]
+    task_list = store.lines()
+    all_tags = store.tags()
+    last_index = len(task_list)
 
-                for tag in tags:
-                    all_tags.append(tag)
+    counts = store.counts()
 
-                status = "completed" if line[:3] == "[x]" else "pending"
+    if tasks_filter == '!top':
+        # the page-sized top K
+        tasks = store.top_priority(page_size(get_configuration()))
+    else:
+        tasks = store.filter(tasks_filter)
 
-                if tasks_filter == '' or tasks_filter == 'all':
-                    render_task(line, index)
-                    
-                
-                if tasks_filter and tasks_filter == status:
-                    render_task(line, index)
+    size = page_size(get_configuration())
+    pages = page_count(len(tasks), size)
+    page = clamp_page(page, len(tasks), size)
 
-                if tasks_filter.startswith("@") and tasks_filter in line.split():
-                    render_task(line, index)
-              
+    progress_bar = f' [bright_white underline]{folder} tasks[/bright_white underline] [grey39][{counts["completed"]}/{counts["lines"]}] [/grey39]'
+    if pages > 1:
+        progress_bar += f'[grey39] page {page + 1}/{pages}[/grey39]'
+    # Display the counts at the top before tasks
+    console.print(progress_bar)
+    linebreak()
 
+    # only the visible page is styled and printed
+    for task in page_items(tasks, page, size):
+        render_task(task.raw, task.line)
 
-                
     linebreak()
 
     menu_options = [
@@ -543,6 +704,13 @@ def view_folder_tasks(folder, prev='', tasks_filter=''):
         Choice(name='Exit application', value=7)
     ]
 
+    if pages > 1:
+        menu_options[:0] = [
+            Choice(name='Next page', value=8),
+            Choice(name='Previous page', value=9),
+            Choice(name='Jump to task', value=10),
+        ]
+
     option = inquirer.fuzzy(
         message='Select option',
         choices=menu_options,
@@ -560,8 +728,8 @@ def view_folder_tasks(folder, prev='', tasks_filter=''):
         selected_tasks_indices = [
             int(i.strip()) for i in selected_tasks.split(",") if i.strip().isdigit()]
 
-        view_selected_tasks(
-            task_list, selected_tasks_indices, file_path, folder)
+        return go(view_selected_tasks,
+                  task_list, selected_tasks_indices, file_path, folder)
 
     # add todo
     if option == 1:
@@ -580,18 +748,15 @@ def view_folder_tasks(folder, prev='', tasks_filter=''):
             ]
         ).execute()
 
-        status = '[ ]' if todo_status == 'Incomplete' else '[x]'
-
         try:
-            with yaspin(text='Creating task...', color='light_magenta') as sp:
-                time.sleep(0.2)
-                with open(file_path, 'a') as file:
-                    file.write(f'{status} {new_todo}\n')
+            with spinner('Creating task...') as sp:
+                pause(0.2)
+                add_task(file_path, new_todo, todo_status == 'Complete')
                 sp.write("Task added successfully")
         except Exception as e:
             print(e)
 
-        view_folder_tasks(folder)
+        return go(view_folder_tasks, folder)
 
     #    filter tasks
     if option == 2:
@@ -600,6 +765,7 @@ def view_folder_tasks(folder, prev='', tasks_filter=''):
             {"key": "s", "value": "status", "name": "Filter by Status"},
             {"key": "t", "value": "tag", "name": "Filter by Tags"},
             {"key": "p", "value": "priority", "name": "Filter by Priority"},
+            {"key": "q", "value": "query", "name": "Filter by Query"},
         ]
 
         status_filters = [
@@ -609,9 +775,16 @@ def view_folder_tasks(folder, prev='', tasks_filter=''):
         ]
 
 
+        priority_filters = [
+            {"key": "t", "value": "!top", "name": "Highest priority first"},
+            {"key": "h", "value": "!1", "name": "High (!high, !1)"},
+            {"key": "m", "value": "!2", "name": "Medium (!medium, !2)"},
+            {"key": "l", "value": "!3", "name": "Low (!low, !3)"},
+        ]
+
         tag_filters = []
 
-        for index,tag in enumerate(list(dict.fromkeys(all_tags))):
+        for index, tag in enumerate(all_tags):
             tag_dict = {
                 "key" : f'{index}',
                 "value": tag,
@@ -637,8 +810,7 @@ def view_folder_tasks(folder, prev='', tasks_filter=''):
                 pointer='>'
             ).execute()
 
-            view_folder_tasks(folder, '', result)
-            print("Invalid selection!")
+            return go(view_folder_tasks, folder, '', result)
 
         if filter_type == 'tag':
             result = inquirer.expand(
@@ -647,8 +819,26 @@ def view_folder_tasks(folder, prev='', tasks_filter=''):
                 choices=tag_filters,
             ).execute()
 
-            view_folder_tasks(folder, '', result)
-            print("Invalid selection!")
+            return go(view_folder_tasks, folder, '', result)
+
+        if filter_type == 'priority':
+            result = inquirer.expand(
+                message="Select priority filter:",
+                instruction='press h to view all choices',
+                choices=priority_filters,
+            ).execute()
+
+            return go(view_folder_tasks, folder, '', result)
+
+        if filter_type == 'query':
+            result = inquirer.text(
+                message='Query (e.g. status:pending tag:@api -tag:@blocked text:"timeout")',
+                style=custom_syles,
+                validate=query_validator,
+                invalid_message='Invalid query',
+            ).execute()
+
+            return go(view_folder_tasks, folder, '', result.strip())
     # edit task
     if option == 3:
         task_index = inquirer.number(
@@ -661,7 +851,7 @@ def view_folder_tasks(folder, prev='', tasks_filter=''):
 
         selected_task = task_list[int(task_index) - 1].rstrip()
 
-        edit_task = inquirer.text(
+        edited_task = inquirer.text(
             message='Edit task',
             style=custom_syles,
             default=selected_task[3:]
@@ -677,24 +867,12 @@ def view_folder_tasks(folder, prev='', tasks_filter=''):
 
         if confirm_edit:
             try:
-                with open(file_path, 'r') as edit_file, tempfile.NamedTemporaryFile('w', delete=False) as edit_temp_file:
-                    edit_temp_name = edit_temp_file.name
-
-                    for index, line in enumerate(edit_file):
-                        line = line.rstrip("\n")
-                        if index == (int(task_index) - 1):
-                            edit_temp_file.write(f"{task_status}{edit_task}\n")
-                        else:
-                            edit_temp_file.write(f"{line}\n")
-
-                os.replace(edit_temp_name, file_path)
+                edit_task(file_path, int(task_index), f"{task_status}{edited_task}")
             except Exception as e:
-                if 'edit_temp_name' in locals():
-                    os.unlink(edit_temp_name)
                 print(f"An error occured: {e}")
-            view_folder_tasks(folder)
+            return go(view_folder_tasks, folder)
         else:
-            view_folder_tasks(folder)
+            return go(view_folder_tasks, folder)
 
     if option == 4:
 
@@ -716,90 +894,122 @@ def view_folder_tasks(folder, prev='', tasks_filter=''):
             export_format_options = [
                 Choice(name="Markdown (.md)", value="md"),
                 Choice(name="JSON (.json)", value="json"),
+                Choice(name="NDJSON (.ndjson)", value="ndjson"),
                 Choice(name="CSV (.csv)", value="csv"),
                 Choice(name="YAML (.yaml)", value="yaml"),
                 Choice(name="HTML (.html)", value="html")
             ]
-            
 
-            export_format = inquirer.select(
-                message="Select format to export tasks",
+            export_formats = inquirer.select(
+                message="Select formats to export tasks",
                 choices=export_format_options,
-                default="txt",
+                multiselect=True,
+                instruction="(space to select, enter to export)",
+                validate=lambda result: len(result) > 0,
+                invalid_message="Please select at least one format.",
                 style=custom_syles,
                 pointer=">"
             ).execute()
 
             delimiter = ','
 
-            if export_format == 'csv':
+            if 'csv' in export_formats:
 
                 select_delimeter = inquirer.text(
                     message="Enter delimiter",
                     default=",",
+                    validate=lambda value: len(value) == 1,
+                    invalid_message="The delimiter must be a single character.",
                     style=custom_syles
                 ).execute()
 
                 delimiter = select_delimeter
 
-            export_tasks(folder, task_list, export_format, delimiter)
+            linebreak()
+
+            try:
+                with timed(f"Exported {len(export_formats)} formats"):
+                    export_paths = export_project(
+                        file_path, folder, export_formats,
+                        exports_folder(root_directory, folder), delimiter)
+            except Exception as e:
+                print(f"An error occurred: {e}")
+                export_paths = {}
+
+            for export_file_path in export_paths.values():
+                console.print(
+                    f" [bright_magenta]✔ Successfully generated {os.path.basename(export_file_path)}")
 
             linebreak()
 
-            view_export = inquirer.select(
+            export_file_path = inquirer.select(
                 message="Select option",
-                default=False,
+                default=None,
                 style=custom_syles,
                 choices=[
-                    Choice(name="View exported file", value=True),
-                    Choice(name="Go back to tasks", value=False)
+                    *[Choice(name=f"View {os.path.basename(path)}", value=path)
+                      for path in export_paths.values()],
+                    Choice(name="Go back to tasks", value=None)
                 ]
             ).execute()
 
-            file_name = ''
-
-            if export_format == 'md':
-                file_name = 'exported_tasks.md'
-            if export_format == 'json':
-                file_name = 'exported_tasks.json'
-            if export_format == 'csv':
-                file_name = 'exported_tasks.csv'
-            if export_format == 'yaml':
-                file_name = 'exported_tasks.yaml'
-            if export_format == 'txt':
-                file_name = 'exported_tasks.txt'
-            if export_format == 'html':
-                file_name = 'exported_tasks.html'
-
-            export_file_path = os.path.join(
-                config['parent_folder_name'], folder, 'exports', file_name)
-
             linebreak()
-            if view_export == True:
-                with yaspin(text=f'Opening {file_name}...', color='light_magenta') as sp:
-                    time.sleep(0.3)
+            if export_file_path is not None:
+                with spinner(f'Opening {os.path.basename(export_file_path)}...') as sp:
+                    pause(0.3)
 
-                if export_format == 'html':
+                if export_file_path.endswith('.html'):
                     webbrowser.open(export_file_path)
                 else:
                     open_file(export_file_path)
-                view_folder_tasks(folder, prev='')
-            else:
-                view_folder_tasks(folder, prev='')
+
+            return go(view_folder_tasks, folder, prev='')
 
         if export_or_import == 'import':
-            view_folder_tasks(folder)
+            config = get_configuration()
+            source_folder = project_source(folder, config)
+
+            if os.path.isdir(source_folder):
+                with spinner(f'Scanning {folder} for TODO comments...') as sp:
+                    imported = harvest(source_folder, file_path,
+                                       ignored=[config['parent_folder_name']])
+                    sp.write(f"Imported {imported} tasks from {folder}")
+            else:
+                print(f"Project folder {source_folder} not found")
+
+            pause(1)
+            return go(view_folder_tasks, folder)
+
+    # pagination
+    if option == 8:
+        return go(view_folder_tasks, folder, prev, tasks_filter, page + 1)
+
+    if option == 9:
+        return go(view_folder_tasks, folder, prev, tasks_filter, page - 1)
+
+    if option == 10:
+        line_number = inquirer.number(
+            message="Enter task index",
+            min_allowed=1,
+            max_allowed=last_index,
+            validate=EmptyInputValidator(),
+            style=custom_syles
+        ).execute()
+
+        return go(view_folder_tasks, folder, prev, tasks_filter,
+                  page_of_line(tasks, int(line_number), size))
 
     # back to projects
     if option == 5:
-        view_projects()
+        return go(view_projects)
     # main menu
     if option == 6:
-        main_menu()
+        return go(main_menu)
     # exit
     if option == 7:
-        exit_app()
-    # export tasks
+        return exit_app()
+
+    return go(view_folder_tasks, folder, prev, tasks_filter, page)
 
 
 def view_selected_tasks(tasks, selected_indices, file_path, folder):
@@ -809,7 +1019,7 @@ def view_selected_tasks(tasks, selected_indices, file_path, folder):
     linebreak()
 
     selected_tasks = [
-        f"{task}" for i, task in enumerate(tasks) if i in selected_indices
+        (i, task) for i, task in enumerate(tasks, start=1) if i in selected_indices
     ]
 
     console.print(
@@ -817,31 +1027,15 @@ def view_selected_tasks(tasks, selected_indices, file_path, folder):
 
     linebreak()
 
-    for index, task in enumerate(selected_tasks):
+    for index, task in selected_tasks:
         render_task(task, index)
 
     linebreak()
 
     def change_status(status):
-        task_status = "[x]" if status == 'complete' else "[ ]"
-
         try:
-            with open(file_path, 'r') as file, tempfile.NamedTemporaryFile("w", delete=False) as temp_file:
-                temp_file_name = temp_file.name
-
-                for index, line in enumerate(file):
-                    line = line.rstrip("\n")
-
-                    if index in selected_indices:
-                        temp_file.write(f"{task_status}{line[3:]} \n")
-                        print(line)
-                    else:
-                        temp_file.write(f'{line}\n')
-
-            os.replace(temp_file_name, file_path)
+            set_status(file_path, selected_indices, status == 'complete')
         except Exception as e:
-            if 'temp_file_name' in locals():
-                os.unlink(temp_file_name)
             print(f"An error occurred: {e}")
 
     # menu
@@ -865,11 +1059,11 @@ def view_selected_tasks(tasks, selected_indices, file_path, folder):
 
     if action == 1:
         change_status('complete')
-        view_folder_tasks(folder)
+        return go(view_folder_tasks, folder)
 
     if action == 2:
         change_status('incomplete')
-        view_folder_tasks(folder)
+        return go(view_folder_tasks, folder)
 
     if action == 3:
         tags = inquirer.text(
@@ -879,66 +1073,38 @@ def view_selected_tasks(tasks, selected_indices, file_path, folder):
         added_tags = tags.split(',')
 
         try:
-            with open(file_path, 'r') as file, tempfile.NamedTemporaryFile("w", delete=False) as temp_file:
-                temp_file_name = temp_file.name
-
-                for index, line in enumerate(file):
-                    line = line.rstrip("\n")
-
-                    if index in selected_indices:
-                        temp_file.write(
-                            f"{line.rstrip()} {' '.join([f'@{tag.strip()}' for tag in added_tags])}\n")
-                        print(line)
-                    else:
-                        temp_file.write(f'{line}\n')
-
-            os.replace(temp_file_name, file_path)
+            add_tags(file_path, selected_indices, added_tags)
         except Exception as e:
-            if 'temp_file_name' in locals():
-                os.unlink(temp_file_name)
             print(f"An error occurred: {e}")
 
-        view_folder_tasks(folder)
+        return go(view_folder_tasks, folder)
 
     if action == 4:
         try:
-            with yaspin(text='Deleting task...', color="light_magenta") as sp:
-                with open(file_path, 'r') as file, tempfile.NamedTemporaryFile("w", delete=False) as temp_file:
-                    temp_file_name = temp_file.name
-                    for index, line in enumerate(file):
-                        if index + 1 not in selected_indices:
-                            temp_file.write(line)
-                        if index + 1 in selected_indices:
-                            sp.write(f'Deleted {line[3:]}')
-
-            os.replace(temp_file_name, file_path)
+            with spinner('Deleting task...') as sp:
+                delete_tasks(file_path, selected_indices)
+                for index, task in selected_tasks:
+                    sp.write(f'Deleted {task[3:]}')
 
         except Exception as e:
-            if 'temp_file_name' in locals():
-                os.unlink(temp_file_name)
             print(f"An error occured: {e}")
 
-        view_folder_tasks(folder, prev='delete')
-
+        return go(view_folder_tasks, folder, prev='delete')
 
-def render_task(line, index):
-    status = '✔' if line[:3] == '[x]' else '☐'
+    return go(view_folder_tasks, folder)
 
-    styled_line = Text(f"  {index}. {status} {line[3:]}") if index > 9 else Text(
-        f"  {index}.  {status} {line[3:]}")
 
-    text = 'grey39' if line[:3] == '[x]' else 'bright_white'
+def query_validator(text):
+    try:
+        compile_query(text)
+    except ValueError:
+        return False
 
-    styled_line.stylize(
-        text, len(str(index)) + 7, len(styled_line))
+    return bool(text.strip())
 
-    styled_line.stylize("grey39", 0, 6)
 
-    for match in re.finditer(r'@(\w+)', line):
-        start, end = match.span()
-        styled_line.stylize("yellow", start + 5, end + 5)
-
-    console.print(styled_line, markup=False)
+def render_task(line, index):
+    console.print(style_task(line, index), markup=False)
 
 
 def exit_app():
@@ -950,9 +1116,9 @@ def exit_app():
 
 def main():
     if has_been_configured():
-        main_menu()
+        navigate(go(main_menu))
     else:
-        set_configuration()
+        navigate(go(set_configuration))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+import json
+import os
+import threading
+from types import MappingProxyType
+
+CONFIG_FILE = 'config.json'
+
+_lock = threading.Lock()
+_cache = {'signature': None, 'snapshot': None}
+
+
+def config_signature(file_name=CONFIG_FILE):
+    try:
+        stat = os.stat(file_name)
+    except FileNotFoundError:
+        return None
+
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_configuration():
+    '''
+        Returns a read-only snapshot of config.json, re-parsing the file only
+        when its mtime or size changes. Returns None when not configured.
+    '''
+    signature = config_signature()
+
+    if signature is None:
+        return None
+
+    with _lock:
+        if _cache['signature'] != signature:
+            with open(CONFIG_FILE, 'r') as file:
+                data = json.load(file)
+
+            _cache['snapshot'] = MappingProxyType(data)
+            _cache['signature'] = signature
+
+        return _cache['snapshot']
+
+
+def save_configuration(config):
+    json_object = json.dumps(dict(config), indent=4)
+
+    with open(CONFIG_FILE, 'w') as file:
+        file.write(json_object)
+
+    invalidate()
+
+
+def invalidate():
+    with _lock:
+        _cache['signature'] = None
+        _cache['snapshot'] = None
@@ -36,4 +36,9 @@ main_menu_options = [
     Choice(name="View current configuration", value=2),
     Choice(name="Update configuration", value=3),
     Choice(name="View Reports", value=4),
+    Choice(name="Search tasks", value=7),
+    Choice(name="Find tasks by tag", value=6),
+    Choice(name="Upcoming / Overdue tasks", value=9),
+    Choice(name="Top priority tasks", value=10),
+    Choice(name="Full-screen mode", value=8),
     Choice(name="Exit application", value=5),]
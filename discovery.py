@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sidecar import workspace_path, atomic_write
+from utils import get_configuration
+
+# Finds projects under every configured root. Roots are scanned in parallel
+# with os.scandir down to "discovery_depth" levels. Each scanned directory's
+# mtime, marker flag and subdirectories are cached in
+# <parent>/.todoscript/discovery.json, so an unchanged tree costs one stat
+# per directory instead of a listing.
+#
+# Without "project_markers" every directory at the configured depth is a
+# project (depth 1 is the original flat layout). With markers, any
+# directory holding one of them is a project and is not descended into.
+# Hidden directories are never scanned, and folder names listed in
+# "discovery_ignore" are skipped as well.
+
+CACHE_NAME = 'discovery.json'
+DEFAULT_DEPTH = 1
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_roots(config):
+    return config.get('roots') or [config['root_folder']]
+
+
+def scan_folder(path, mtime, markers, ignored, excluded):
+    '''
+        Lists one folder: returns [mtime, holds a marker, subdirectories], or
+        None when it cannot be read.
+    '''
+    marked = False
+    children = []
+
+    try:
+        with os.scandir(path) as items:
+            for item in items:
+                if item.name in markers:
+                    marked = True
+                if (item.name.startswith('.') or item.name in ignored
+                        or not item.is_dir(follow_symlinks=False)
+                        or os.path.abspath(item.path) in excluded):
+                    continue
+                children.append(item.name)
+    except OSError:
+        return None
+
+    return [mtime, marked, sorted(children)]
+
+
+def scan_root(root, depth, markers, ignored, excluded, cached):
+    '''
+        Returns ([relative project paths], {relative dir: [mtime, marked,
+        subdirectories]}) for one root, reusing cached listings of
+        directories whose mtime has not changed.
+    '''
+    entries = {}
+    projects = []
+    stack = [('', 0)]
+    prefix = os.path.join(root, '')
+    stat = os.stat
+
+    while stack:
+        relative, level = stack.pop()
+
+        try:
+            mtime = stat(prefix + relative).st_mtime_ns
+        except OSError:
+            continue
+
+        entry = cached.get(relative)
+        if entry is None or entry[0] != mtime:
+            entry = scan_folder(prefix + relative, mtime, markers, ignored, excluded)
+            if entry is None:
+                continue
+
+        entries[relative] = entry
+
+        if level and (entry[1] if markers else level == depth):
+            projects.append(relative)
+        elif level < depth:
+            base = relative + os.sep if relative else ''
+            stack.extend((base + child, level + 1) for child in reversed(entry[2]))
+
+    return sorted(projects), entries
+
+
+def load_cache(parent_folder):
+    with _cache_lock:
+        if parent_folder in _cache:
+            return _cache[parent_folder]
+
+    try:
+        with open(workspace_path(parent_folder, CACHE_NAME), encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_cache(parent_folder, cache):
+    with _cache_lock:
+        _cache[parent_folder] = cache
+
+    atomic_write(workspace_path(parent_folder, CACHE_NAME, create=True),
+                 lambda file: json.dump(cache, file))
+
+
+def project_names(found):
+    '''
+        Maps (root, relative path) pairs to TODOs folder names: nested paths
+        are joined with '-', and names found under more than one root are
+        prefixed with the root's folder name. Names that still collide
+        (a/b-c and a-b/c) get a suffix hashed from their source folder.
+    '''
+    labels = {root: os.path.basename(os.path.abspath(root)) for root, _ in found}
+    flat = [(root, relative, relative.replace(os.sep, '-')) for root, relative in found]
+
+    roots = {}
+    for root, _, name in flat:
+        roots.setdefault(name, set()).add(root)
+
+    sources = {}
+    for root, relative, name in flat:
+        if len(roots[name]) > 1:
+            name = f"{labels[root]}-{name}"
+        sources.setdefault(name, []).append(os.path.join(root, relative))
+
+    names = {}
+    for name, paths in sources.items():
+        if len(paths) == 1:
+            names[name] = paths[0]
+            continue
+
+        for path in paths:
+            digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:6]
+            names[f"{name}-{digest}"] = path
+
+    return dict(sorted(names.items()))
+
+
+def discover(config=None):
+    '''
+        Returns {project name: source folder} for every configured root.
+    '''
+    config = config or get_configuration()
+    parent_folder = config['parent_folder_name']
+    roots = get_roots(config)
+    depth = config.get('discovery_depth') or DEFAULT_DEPTH
+    markers = set(config.get('project_markers') or [])
+    ignored = set(config.get('discovery_ignore') or [])
+    excluded = {os.path.abspath(parent_folder)}
+
+    cache = load_cache(parent_folder)
+    settings = [depth, sorted(markers), sorted(ignored)]
+    if cache.get('settings') != settings:
+        cache = {'settings': settings, 'roots': {}}
+
+    def scan(root):
+        return scan_root(root, depth, markers, ignored, excluded, cache['roots'].get(os.path.abspath(root), {}))
+
+    with ThreadPoolExecutor(max_workers=max(1, len(roots))) as executor:
+        results = list(executor.map(scan, roots))
+
+    found = []
+    changed = False
+    new_roots = {}
+
+    for root, (projects, entries) in zip(roots, results):
+        key = os.path.abspath(root)
+        new_roots[key] = entries
+        changed = changed or cache['roots'].get(key) != entries
+        found.extend((root, relative) for relative in projects)
+
+    changed = changed or set(new_roots) != set(cache['roots'])
+    if changed or parent_folder not in _cache:
+        new_cache = {'settings': settings, 'roots': new_roots}
+        if changed:
+            save_cache(parent_folder, new_cache)
+        else:
+            with _cache_lock:
+                _cache[parent_folder] = new_cache
+
+    return project_names(found)
+
+
+def project_source(project, config=None):
+    '''
+        Returns the source folder a TODOs project was generated from.
+    '''
+    config = config or get_configuration()
+    return discover(config).get(project, os.path.join(config['root_folder'], project))
@@ -0,0 +1,75 @@
+import bisect
+import heapq
+from datetime import date
+
+from workspace_index import WorkspaceIndex, get_index
+
+
+class DueIndex(WorkspaceIndex):
+    '''
+        Pending tasks with a due date, kept in one list sorted by
+        (due, project, line) so the next N due tasks of the whole workspace
+        are a slice and the overdue ones a bisect away.
+    '''
+
+    name = 'due'
+
+    def reset(self):
+        # sorted [(due, project, line, raw)]
+        self.entries = []
+        self.project_entries = {}
+
+    def add_project(self, project, tasks):
+        entries = [(task.due, project, task.line, task.raw)
+                   for task in tasks if task.due and task.status == 'pending']
+
+        if len(entries) > len(self.entries) // 8:
+            self.entries = list(heapq.merge(self.entries, sorted(entries)))
+        else:
+            for entry in entries:
+                bisect.insort(self.entries, entry)
+
+        self.project_entries[project] = entries
+
+    def remove_project(self, project):
+        entries = self.project_entries.pop(project, [])
+
+        if len(entries) > len(self.entries) // 8:
+            self.entries = [entry for entry in self.entries if entry[1] != project]
+            return
+
+        for entry in entries:
+            position = bisect.bisect_left(self.entries, entry)
+            if position < len(self.entries) and self.entries[position] == entry:
+                del self.entries[position]
+
+    def to_data(self):
+        return self.entries
+
+    def load_data(self, data):
+        self.entries = [tuple(entry) for entry in data]
+        self.project_entries = {}
+
+        for entry in self.entries:
+            self.project_entries.setdefault(entry[1], []).append(entry)
+
+    # queries
+
+    def overdue(self, today=None):
+        '''
+            Returns [(due, project, line, raw)] due before today, oldest first.
+        '''
+        today = today or date.today().isoformat()
+        return self.entries[:bisect.bisect_left(self.entries, (today,))]
+
+    def upcoming(self, limit=10, today=None):
+        '''
+            Returns the next limit tasks due today or later.
+        '''
+        today = today or date.today().isoformat()
+        start = bisect.bisect_left(self.entries, (today,))
+        return self.entries[start:start + limit]
+
+
+def get_due_index(parent_folder):
+    return get_index(DueIndex, parent_folder)
@@ -0,0 +1,384 @@
+import csv
+import hashlib
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import formats
+import journal
+import sqlite_store
+from sidecar import workspace_path, atomic_write
+
+# Single-pass export: tasks are streamed from the project's source once and
+# every record is handed to each requested format writer in turn, so memory
+# stays flat however many tasks or formats there are.
+
+EXPORTS_FOLDER = 'exports'
+
+HTML_STYLE = "<style>body{font-family: 'Inter' }#tags_container{display: flex; flex-wrap: wrap; gap: 10px;} .tag{color: #d50dd5; font-weight: 600;} .task{display:flex; gap:10px; align-items: center}</style>"
+HTML_LINKS = '<link rel="preconnect" href="https://fonts.googleapis.com"><link rel="preconnect" href="https://fonts.gstatic.com" crossorigin><link href="https://fonts.googleapis.com/css2?family=Inter:ital,opsz,wght@0,14..32,100..900;1,14..32,100..900&display=swap" rel="stylesheet">'
+
+
+def export_record(index, raw):
+    marker = raw[:3]
+    completed = marker == '[x]'
+    text = raw[3:] if marker in ('[x]', '[ ]') else raw
+
+    return {
+        'id': index,
+        'task': ' '.join(word for word in text.split() if not word.startswith('@')),
+        'status': 'Complete' if completed else 'Incomplete',
+        'tags': list(dict.fromkeys(word[1:] for word in text.split() if word.startswith('@'))),
+        'raw': raw,
+    }
+
+
+def iter_lines(file_path):
+    '''
+        Yields the raw task lines of a todos file without loading the whole
+        file. A pending journal or the SQLite backend is read through their
+        own paths.
+    '''
+    from store import get_storage_mode
+
+    if get_storage_mode() == 'sqlite':
+        yield from sqlite_store.iter_lines(*sqlite_store.locate(file_path))
+    elif os.path.exists(journal.journal_path(file_path)):
+        # replaying needs the whole file; compaction brings streaming back
+        yield from journal.replay(list(formats.read_lines(file_path)), file_path)
+    else:
+        yield from formats.read_lines(file_path)
+
+
+# writers: one per format, fed one record at a time
+
+
+class CsvWriter:
+    def __init__(self, file, title, delimiter=','):
+        self.writer = csv.writer(file, delimiter=delimiter, lineterminator="\n")
+        self.writer.writerow(['ID', 'Task', 'Tags', 'Status'])
+
+    def write(self, record):
+        self.writer.writerow([record['id'] + 1, record['task'], ' | '.join(record['tags']),
+                              'completed' if record['status'] == 'Complete' else 'pending'])
+
+    def close(self):
+        pass
+
+
+class JsonWriter:
+    def __init__(self, file, title, delimiter=','):
+        self.file = file
+        self.separator = "\n"
+        file.write("[")
+
+    def write(self, record):
+        data = {key: record[key] for key in ('id', 'task', 'status', 'tags')}
+        self.file.write(f"{self.separator}{json.dumps(data)}")
+        self.separator = ",\n"
+
+    def close(self):
+        self.file.write("\n]\n")
+
+
+class NdjsonWriter:
+    def __init__(self, file, title, delimiter=','):
+        self.file = file
+
+    def write(self, record):
+        data = {key: record[key] for key in ('id', 'task', 'status', 'tags')}
+        self.file.write(f"{json.dumps(data)}\n")
+
+    def close(self):
+        pass
+
+
+class YamlWriter:
+    def __init__(self, file, title, delimiter=','):
+        self.file = file
+        file.write("tasks:\n")
+
+    def write(self, record):
+        # JSON scalars are valid YAML and keep quotes and colons safe
+        self.file.write(
+            f"- id: {record['id']}\n"
+            f"  task: {json.dumps(record['task'])}\n"
+            f"  status: {record['status']}\n"
+            f"  tags: {json.dumps(record['tags'])}\n"
+        )
+
+    def close(self):
+        pass
+
+
+class MarkdownWriter:
+    def __init__(self, file, title, delimiter=','):
+        self.file = file
+        file.write(f"## {title} tasks\n\n")
+
+    def write(self, record):
+        raw = record['raw']
+        self.file.write(f"- {raw}\n" if raw[:3] in ('[x]', '[ ]') else f"{raw}\n")
+
+    def close(self):
+        pass
+
+
+class HtmlWriter:
+    def __init__(self, file, title, delimiter=','):
+        self.file = file
+        file.write(f"<html><head><meta charset=\"UTF-8\">{HTML_STYLE}{HTML_LINKS}</head>"
+                   f"<body><h1>{html.escape(title)} tasks</h1><main>\n")
+
+    def write(self, record):
+        index = record['id']
+        checked = "checked" if record['status'] == 'Complete' else ""
+        tags_html = ",".join(f"<span class='tag'>@{html.escape(tag)}</span>" for tag in record['tags'])
+
+        self.file.write(
+            f'<div class="task"><input type="checkbox" id="task-{index}" {checked}>'
+            f'<label for="task-{index}">{html.escape(record["task"])}</label> '
+            f'<div id="tags_container">{tags_html}</div></div>\n')
+
+    def close(self):
+        self.file.write("</main></body></html>\n")
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'json': JsonWriter,
+    'ndjson': NdjsonWriter,
+    'yaml': YamlWriter,
+    'md': MarkdownWriter,
+    'html': HtmlWriter,
+}
+
+
+def export_lines(lines, outputs, title, delimiter=','):
+    '''
+        Streams lines once through a writer per (format, file) in outputs.
+        Returns the number of tasks exported.
+    '''
+    writers = [WRITERS[format](file, title, delimiter) for format, file in outputs]
+
+    count = 0
+    for index, raw in enumerate(lines):
+        record = export_record(index, raw)
+        for writer in writers:
+            writer.write(record)
+        count += 1
+
+    for writer in writers:
+        writer.close()
+
+    return count
+
+
+def exports_folder(parent_folder, project):
+    return os.path.join(parent_folder, project, EXPORTS_FOLDER)
+
+
+def export_file_name(format):
+    return f'exported_tasks.{format}'
+
+
+def export_project(file_path, project, export_formats, output_folder, delimiter=','):
+    '''
+        Writes every format in export_formats to output_folder in one pass
+        over the project's tasks. Returns {format: path}.
+    '''
+    os.makedirs(output_folder, exist_ok=True)
+
+    paths = {format: os.path.join(output_folder, export_file_name(format)) for format in export_formats}
+    files = {}
+
+    try:
+        for format, path in paths.items():
+            files[format] = open(path, 'w', encoding='utf-8', newline='')
+
+        export_lines(iter_lines(file_path), list(files.items()), project, delimiter)
+    finally:
+        for file in files.values():
+            file.close()
+
+    return paths
+
+
+# bulk export
+#
+# Exports every project of a workspace over a process pool. A manifest in
+# <parent>/.todoscript/exports.json remembers each project's source
+# signature and hash and every output with the options it was written
+# with, so unchanged projects are skipped on the next run.
+
+MANIFEST_NAME = 'exports.json'
+HASH_CHUNK = 1024 * 1024
+POOL_THRESHOLD = 8
+
+
+def source_paths(file_path):
+    paths = [file_path]
+    if os.path.exists(journal.journal_path(file_path)):
+        paths.append(journal.journal_path(file_path))
+    return paths
+
+
+def source_digest(file_path):
+    digest = hashlib.sha1()
+    for path in source_paths(file_path):
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_size(file_path):
+    return sum(os.path.getsize(path) for path in source_paths(file_path))
+
+
+def load_manifest(parent_folder):
+    try:
+        with open(workspace_path(parent_folder, MANIFEST_NAME), encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(parent_folder, manifest):
+    atomic_write(workspace_path(parent_folder, MANIFEST_NAME, create=True),
+                 lambda file: json.dump(manifest, file))
+
+
+def export_job(file_path, project, export_formats, output_folder, delimiter, hash_source=False):
+    '''
+        Pool worker: exports one project. Returns (project, {format: path},
+        bytes read, bytes written, source hash); paths is None when the
+        export failed. The source is hashed here, not in the parent, only
+        when hash_source is set.
+    '''
+    try:
+        digest = source_digest(file_path) if hash_source else None
+        paths = export_project(file_path, project, export_formats, output_folder, delimiter)
+        written = sum(os.path.getsize(path) for path in paths.values())
+        return project, paths, source_size(file_path), written, digest
+    except (OSError, ValueError) as e:
+        print(f"{project}: export failed: {e}")
+        return project, None, 0, 0, None
+
+
+def output_key(format, path, delimiter):
+    # the delimiter only changes csv output
+    return [os.path.abspath(path), delimiter if format == 'csv' else None]
+
+
+def plan_exports(parent_folder, export_formats, output_root, manifest, force=False, delimiter=','):
+    '''
+        Returns (jobs, skipped projects, fresh manifest entries). A project is
+        skipped when its source signature, or failing that its hash, is
+        unchanged and every requested format was already exported to the
+        same place with the same options. Jobs are (file_path, project,
+        formats, output folder, hash source); a source that has to be hashed
+        is hashed by the worker that exports it.
+    '''
+    from store import find_tasks_file, list_projects, stat_signature, get_storage_mode
+
+    hashable = get_storage_mode() != 'sqlite'
+    jobs = []
+    skipped = []
+    entries = {}
+
+    for project in list_projects(parent_folder):
+        try:
+            file_path = find_tasks_file(os.path.join(parent_folder, project))
+        except IndexError:
+            continue
+
+        if output_root:
+            output_folder = os.path.join(output_root, project)
+        else:
+            output_folder = exports_folder(parent_folder, project)
+
+        signature = list(stat_signature(file_path))
+        entry = manifest.get(project, {})
+        wanted = {format: output_key(format, os.path.join(output_folder, export_file_name(format)), delimiter)
+                  for format in export_formats}
+
+        digest = None
+        if force or not entry:
+            unchanged = False
+        elif entry['signature'] == signature:
+            unchanged = True
+            digest = entry['sha1']
+        elif hashable and entry['signature'][1::2] != signature[1::2]:
+            # a different size is a modification, no need to hash
+            unchanged = False
+        elif hashable:
+            # touched but maybe not modified, the hash decides
+            digest = source_digest(file_path)
+            unchanged = digest == entry['sha1']
+        else:
+            unchanged = False
+
+        if unchanged:
+            outputs = {**entry['outputs'], **wanted}
+            missing = [format for format, key in wanted.items()
+                       if entry['outputs'].get(format) != key or not os.path.exists(key[0])]
+        else:
+            outputs = wanted
+            missing = list(export_formats)
+
+        entries[project] = {'signature': signature, 'sha1': digest, 'outputs': outputs}
+
+        if missing:
+            jobs.append((file_path, project, missing, output_folder, hashable and digest is None))
+        else:
+            skipped.append(project)
+
+    return jobs, skipped, entries
+
+
+def bulk_export(parent_folder, export_formats, output_root=None, delimiter=',', max_workers=None, force=False):
+    '''
+        Exports every project in export_formats. Returns a stats dict with the
+        projects exported, skipped and failed, bytes read and written and the
+        elapsed seconds.
+    '''
+    start = time.perf_counter()
+    manifest = load_manifest(parent_folder)
+
+    jobs, skipped, entries = plan_exports(parent_folder, export_formats, output_root, manifest, force, delimiter)
+    arguments = [(file_path, project, missing, output_folder, delimiter, hash_source)
+                 for file_path, project, missing, output_folder, hash_source in jobs]
+
+    if len(arguments) >= POOL_THRESHOLD:
+        # planning may have opened a SQLite connection that forked workers must not reuse
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                 initializer=sqlite_store.reset_connections) as executor:
+            results = list(executor.map(export_job, *zip(*arguments)))
+    else:
+        results = [export_job(*job) for job in arguments]
+
+    stats = {'exported': 0, 'skipped': len(skipped), 'failed': 0, 'bytes_read': 0, 'bytes_written': 0}
+
+    for project, paths, read, written, digest in results:
+        if paths is None:
+            stats['failed'] += 1
+            manifest.pop(project, None)
+            continue
+
+        manifest[project] = entries[project]
+        if digest is not None:
+            manifest[project]['sha1'] = digest
+        stats['exported'] += 1
+        stats['bytes_read'] += read
+        stats['bytes_written'] += written
+
+    for project in skipped:
+        manifest[project] = entries[project]
+
+    save_manifest(parent_folder, manifest)
+
+    stats['elapsed'] = time.perf_counter() - start
+    return stats
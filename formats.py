@@ -0,0 +1,190 @@
+import csv
+import json
+import os
+
+from sidecar import atomic_write
+
+# One reader and one writer per configured file_format. Readers are
+# generators that yield raw task lines ("[ ] text @tag"), so every format
+# feeds the same task model; writers take any iterable of raw lines.
+
+MARKERS = {'completed': '[x]', 'pending': '[ ]'}
+
+
+def split_raw(raw):
+    marker = raw[:3]
+
+    if marker == '[x]':
+        return 'completed', raw[3:].strip()
+    if marker == '[ ]':
+        return 'pending', raw[3:].strip()
+
+    return None, raw
+
+
+def join_raw(status, text):
+    marker = MARKERS.get(status)
+    return f"{marker} {text}" if marker else text
+
+
+def format_of(file_path):
+    extension = os.path.splitext(file_path)[1].lstrip('.').lower()
+    return 'yaml' if extension == 'yml' else extension
+
+
+# txt
+
+
+def read_txt(file):
+    for line in file:
+        yield line.rstrip("\r\n")
+
+
+def write_txt(file, lines):
+    for line in lines:
+        file.write(f"{line}\n")
+
+
+# md
+
+
+def read_md(file):
+    # only the header written by write_md is skipped, blank lines and other
+    # "## " lines are part of the list
+    header = 0
+    for line in file:
+        line = line.rstrip("\r\n")
+
+        if header == 0 and line == '## Tasks' or header == 1 and not line:
+            header += 1
+            continue
+        header = 2
+
+        if line.startswith('- [x]') or line.startswith('- [ ]'):
+            yield line[2:]
+        else:
+            yield line
+
+
+def write_md(file, lines):
+    file.write("## Tasks\n\n")
+    for line in lines:
+        status, _ = split_raw(line)
+        file.write(f"- {line}\n" if status else f"{line}\n")
+
+
+# json: one object per line inside the array, so it can be read back lazily
+
+
+def read_json(file):
+    # the layout is decided on the first object, before anything is yielded
+    start = file.tell()
+    lines = (line.strip().rstrip(',') for line in file)
+
+    opening = next((line for line in lines if line), None)
+    if opening is None:
+        return
+
+    first = next((line for line in lines if line), None) if opening == '[' else None
+    if first == ']':
+        return
+
+    try:
+        task = json.loads(first) if first else None
+    except json.JSONDecodeError:
+        task = None
+
+    if task is None:
+        # not our one-object-per-line layout; load the whole document
+        file.seek(start)
+        for task in json.load(file):
+            yield join_raw(task.get('status'), task.get('text', ''))
+        return
+
+    yield join_raw(task.get('status'), task.get('text', ''))
+
+    for line in lines:
+        if line in ('', ']'):
+            continue
+
+        task = json.loads(line)
+        yield join_raw(task.get('status'), task.get('text', ''))
+
+
+def write_json(file, lines):
+    file.write("[")
+    separator = "\n"
+    for line in lines:
+        status, text = split_raw(line)
+        file.write(f"{separator}{json.dumps({'status': status, 'text': text})}")
+        separator = ",\n"
+    file.write("\n]\n")
+
+
+# csv
+
+
+def read_csv(file):
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    for row in reader:
+        if len(row) >= 2:
+            yield join_raw(row[0] or None, row[1])
+
+
+def write_csv(file, lines):
+    writer = csv.writer(file, lineterminator="\n")
+    writer.writerow(['status', 'text'])
+    for line in lines:
+        writer.writerow(split_raw(line))
+
+
+# yaml: a fixed block layout with JSON-quoted (valid YAML) scalars
+
+
+def read_yaml_scalar(value):
+    value = value.strip()
+
+    if value in ('', 'null', '~'):
+        return None
+    if value.startswith('"'):
+        return json.loads(value)
+
+    return value
+
+
+def read_yaml(file):
+    status = None
+    for line in file:
+        line = line.rstrip("\r\n")
+
+        if line.startswith('- status:'):
+            status = read_yaml_scalar(line[len('- status:'):])
+        elif line.startswith('  text:'):
+            yield join_raw(status, read_yaml_scalar(line[len('  text:'):]) or '')
+
+
+def write_yaml(file, lines):
+    file.write("tasks:\n")
+    for line in lines:
+        status, text = split_raw(line)
+        file.write(f"- status: {status or 'null'}\n  text: {json.dumps(text)}\n")
+
+
+READERS = {'txt': read_txt, 'md': read_md, 'json': read_json, 'csv': read_csv, 'yaml': read_yaml}
+WRITERS = {'txt': write_txt, 'md': write_md, 'json': write_json, 'csv': write_csv, 'yaml': write_yaml}
+
+
+def read_lines(file_path):
+    reader = READERS.get(format_of(file_path), read_txt)
+
+    with open(file_path, encoding='utf-8', newline='') as file:
+        yield from reader(file)
+
+
+def write_lines(file_path, lines):
+    writer = WRITERS.get(format_of(file_path), write_txt)
+    atomic_write(file_path, lambda file: writer(file, lines))
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from sidecar import sidecar_path, atomic_write
+
+# Pulls TODO/FIXME comments out of a project's source tree into its todos
+# file. A per-file (mtime, size, hash) cache in .todoscript/harvest.json
+# means re-imports only read files that changed.
+
+CACHE_NAME = 'harvest.json'
+
+IGNORED_DIRS = {
+    '.git', '.hg', '.svn', '.todoscript', '.venv', 'venv', 'env', 'node_modules',
+    '__pycache__', '.mypy_cache', '.pytest_cache', '.tox', 'dist', 'build', 'target',
+    'vendor', '.idea', '.vscode',
+}
+
+COMMENT_PATTERN = re.compile(
+    rb'(?:#|//|/\*|<!--|--|;|\*)\s*(TODO|FIXME)\b[\s:(\-]*(.*?)\s*(?:\*/|-->)?\s*$', re.MULTILINE)
+
+BINARY_SNIFF_BYTES = 8192
+MMAP_THRESHOLD = 1024 * 1024
+POOL_THRESHOLD = 64
+
+
+def is_binary(sample):
+    return b'\0' in sample
+
+
+def scan_file(path, known_digest=None):
+    '''
+        Returns (sha1, [(kind, text)]) for one source file. Binary files give
+        (None, []), unreadable ones None, and files whose hash still equals
+        known_digest (known_digest, None) so the cached comments are reused.
+    '''
+    try:
+        with open(path, 'rb') as file:
+            if is_binary(file.read(BINARY_SNIFF_BYTES)):
+                return (None, [])
+
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return (hashlib.sha1(b'').hexdigest(), [])
+
+            if size >= MMAP_THRESHOLD:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    digest = hashlib.sha1(data).hexdigest()
+                    if digest == known_digest:
+                        return (digest, None)
+                    matches = COMMENT_PATTERN.findall(data)
+            else:
+                file.seek(0)
+                data = file.read()
+                digest = hashlib.sha1(data).hexdigest()
+                if digest == known_digest:
+                    return (digest, None)
+                matches = COMMENT_PATTERN.findall(data)
+    except (OSError, ValueError):
+        return None
+
+    comments = []
+    for kind, text in matches:
+        text = text.decode('utf-8', errors='replace').strip()
+        if text:
+            comments.append((kind.decode('ascii').lower(), text))
+
+    return (digest, comments)
+
+
+def walk_source_files(source_folder, ignored=()):
+    ignored = IGNORED_DIRS | set(ignored)
+
+    for folder, dirs, files in os.walk(source_folder):
+        dirs[:] = [d for d in dirs if d not in ignored]
+
+        for name in files:
+            path = os.path.join(folder, name)
+            if os.path.isfile(path) and not os.path.islink(path):
+                yield path
+
+
+def task_hash(kind, text):
+    return hashlib.sha1(f"{kind}:{text}".encode('utf-8')).hexdigest()
+
+
+def load_cache(file_path):
+    try:
+        with open(sidecar_path(file_path, CACHE_NAME), encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'files': {}, 'imported': []}
+
+
+def save_cache(file_path, cache):
+    atomic_write(sidecar_path(file_path, CACHE_NAME, create=True),
+                 lambda file: json.dump(cache, file))
+
+
+def harvest(source_folder, file_path, ignored=(), max_workers=None):
+    '''
+        Imports new TODO/FIXME comments from source_folder into the todos
+        file at file_path. Returns the number of tasks added.
+    '''
+    from store import add_tasks, get_store
+
+    cache = load_cache(file_path)
+    cached_files = cache['files']
+    seen = {}
+    to_scan = []
+
+    for path in walk_source_files(source_folder, ignored):
+        relative_path = os.path.relpath(path, source_folder)
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+
+        entry = cached_files.get(relative_path)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            seen[relative_path] = entry
+        else:
+            to_scan.append((relative_path, path, stat))
+
+    paths = [path for _, path, _ in to_scan]
+    known_digests = [cached_files.get(relative_path, [None] * 3)[2]
+                     for relative_path, _, _ in to_scan]
+
+    if len(paths) >= POOL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(scan_file, paths, known_digests, chunksize=16))
+    else:
+        results = [scan_file(path, digest) for path, digest in zip(paths, known_digests)]
+
+    for (relative_path, _, stat), result in zip(to_scan, results):
+        if result is None:
+            continue
+
+        digest, comments = result
+        if comments is None:
+            # touched but unchanged, keep the cached comments
+            comments = cached_files[relative_path][3]
+
+        seen[relative_path] = [stat.st_mtime_ns, stat.st_size, digest, comments]
+
+    imported = set(cache['imported'])
+    existing = {task.text.strip() for task in get_store(file_path).tasks}
+    new_tasks = []
+
+    for entry in seen.values():
+        for kind, text in entry[3]:
+            digest = task_hash(kind, text)
+            line = f"{text} @{kind}"
+
+            if digest in imported or line in existing:
+                continue
+
+            imported.add(digest)
+            existing.add(line)
+            new_tasks.append(line)
+
+    if new_tasks:
+        add_tasks(file_path, new_tasks)
+
+    save_cache(file_path, {'files': seen, 'imported': sorted(imported)})
+
+    return len(new_tasks)
@@ -0,0 +1,338 @@
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+import formats
+import summary
+from sidecar import sidecar_path
+
+# Journaled storage appends each mutation as one JSON record to
+# .todoscript/journal.log. Readers replay the log on top of the base todos
+# file and compaction folds it back into the base file.
+#
+# Records are positional, so a journal only applies to the base file it was
+# started on: its first record stamps that file's inode, mtime and size.
+# Compaction marks the journal once the base file holds its records, so a
+# journal left behind by a crash before its removal is recognised and
+# dropped instead of being replayed a second time. Any other mismatch means the todos file was
+# edited outside todoscript; that journal is moved aside with a warning
+# rather than replayed onto the wrong lines or silently lost.
+
+JOURNAL_NAME = 'journal.log'
+LOCK_NAME = 'journal.lock'
+DEFAULT_COMPACT_BYTES = 64 * 1024
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def lock_file(path):
+    file = open(path, 'a+b')
+
+    try:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ten seconds, keep waiting
+                    continue
+    except Exception:
+        file.close()
+        raise
+
+    return file
+
+
+def unlock_file(file):
+    try:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        file.close()
+
+
+class ProjectLock:
+    '''
+        Re-entrant lock for one todos file. An RLock keeps threads apart and
+        a lock file in the sidecar folder keeps processes apart, e.g. a cron
+        job and the interactive menus. Only the outermost acquisition takes
+        the file lock.
+    '''
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.file = None
+
+    def __enter__(self):
+        self.lock.acquire()
+
+        if self.depth == 0:
+            try:
+                self.file = lock_file(sidecar_path(self.file_path, LOCK_NAME, create=True))
+            except Exception:
+                self.lock.release()
+                raise
+
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.depth -= 1
+
+        if self.depth == 0:
+            file, self.file = self.file, None
+            unlock_file(file)
+
+        self.lock.release()
+        return False
+
+
+def get_lock(file_path):
+    file_path = os.path.abspath(file_path)
+
+    with _locks_guard:
+        lock = _locks.get(file_path)
+        if lock is None:
+            lock = _locks[file_path] = ProjectLock(file_path)
+
+    return lock
+
+
+def journal_path(file_path, create=False):
+    return sidecar_path(file_path, JOURNAL_NAME, create)
+
+
+# records
+
+
+def apply_to_line(record, line_number, line):
+    '''
+        Returns the new text for line_number, or None if the record deletes it.
+    '''
+    op = record['op']
+
+    if op == 'status':
+        if line_number in record['lines'] and line[:3] in ('[x]', '[ ]'):
+            return f"{record['status']}{line[3:]}"
+    elif op == 'edit':
+        if line_number == record['line']:
+            return record['text']
+    elif op == 'tags':
+        if line_number in record['lines']:
+            return f"{line.rstrip()} {' '.join(record['tags'])}"
+    elif op == 'delete':
+        if line_number in record['lines']:
+            return None
+
+    return line
+
+
+def apply_record(lines, record):
+    if record['op'] == 'add':
+        lines.extend(record['lines'])
+        return lines
+
+    if 'lines' in record:
+        record = {**record, 'lines': set(record['lines'])}
+
+    new_lines = []
+    for line_number, line in enumerate(lines, start=1):
+        new_line = apply_to_line(record, line_number, line)
+        if new_line is not None:
+            new_lines.append(new_line)
+
+    return new_lines
+
+
+def base_stamp(file_path):
+    stat = os.stat(file_path)
+    return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+def is_current(file_path, first_record):
+    '''
+        True when the journal starting with first_record was written against
+        the current base file.
+    '''
+    if first_record is None or first_record['op'] != 'base':
+        return False
+
+    try:
+        return first_record['stamp'] == base_stamp(file_path)
+    except FileNotFoundError:
+        return False
+
+
+def set_aside(file_path):
+    '''
+        Moves a journal that no longer matches its base file out of the
+        way, with a warning when that leaves changes unapplied.
+    '''
+    with get_lock(file_path):
+        path = journal_path(file_path)
+        records = read_all(file_path)
+
+        # another process may have replaced it meanwhile
+        if not records or is_current(file_path, records[0]):
+            return
+
+        changes = [record for record in records if record['op'] not in ('base', 'compacted')]
+
+        if not changes or records[-1]['op'] == 'compacted':
+            os.remove(path)
+            return
+
+        stale_path = f"{path}.{time.strftime('%Y%m%d%H%M%S')}.stale"
+        os.replace(path, stale_path)
+        print(f"Warning: {file_path} was changed outside todoscript; {len(changes)} journaled "
+              f"changes were not applied and were moved to {stale_path}", file=sys.stderr)
+
+
+def read_all(file_path):
+    path = journal_path(file_path)
+
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # a torn final write; everything before it is still valid
+                break
+
+    return records
+
+
+def read_first(path):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.loads(file.readline())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def read_records(file_path):
+    '''
+        Returns the records to replay on the base file. A journal that
+        belongs to an earlier base file is set aside and gives none.
+    '''
+    records = read_all(file_path)
+
+    if not records:
+        return []
+
+    if not is_current(file_path, records[0]):
+        set_aside(file_path)
+        return []
+
+    return [record for record in records if record['op'] not in ('base', 'compacted')]
+
+
+def replay_records(lines, records):
+    for record in records:
+        lines = apply_record(lines, record)
+
+    return lines
+
+
+def replay(lines, file_path):
+    return replay_records(lines, read_records(file_path))
+
+
+def append(file_path, record, compact_bytes=DEFAULT_COMPACT_BYTES):
+    with get_lock(file_path):
+        path = journal_path(file_path, create=True)
+        first = read_first(path)
+
+        if first is not None and not is_current(file_path, first):
+            set_aside(file_path)
+            first = None
+
+        fresh = first is None
+
+        with open(path, 'w' if fresh else 'a', encoding='utf-8') as file:
+            if fresh:
+                file.write(json.dumps({'op': 'base', 'stamp': base_stamp(file_path)}) + "\n")
+            file.write(json.dumps(record) + "\n")
+            size = file.tell()
+
+    if size >= compact_bytes:
+        compact_in_background(file_path)
+
+
+# compaction
+
+
+def compact(file_path):
+    from store import stat_signature
+
+    with get_lock(file_path):
+        path = journal_path(file_path)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+
+        before = stat_signature(file_path)
+        records = read_records(file_path)
+
+        if not os.path.exists(path):
+            # it was stale and has been set aside
+            return
+
+        if records:
+            formats.write_lines(file_path, replay_records(list(formats.read_lines(file_path)), records))
+
+            # marks the journal as folded in, should a crash beat the remove
+            with open(path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps({'op': 'compacted'}) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+
+        os.remove(path)
+
+        # same tasks, new signature
+        summary.update(file_path, before, [])
+
+
+_compacting = set()
+
+
+def compact_in_background(file_path):
+    file_path = os.path.abspath(file_path)
+
+    with _locks_guard:
+        if file_path in _compacting:
+            return
+        _compacting.add(file_path)
+
+    def run():
+        try:
+            compact(file_path)
+        finally:
+            with _locks_guard:
+                _compacting.discard(file_path)
+
+    threading.Thread(target=run).start()
@@ -0,0 +1,141 @@
+import os
+from array import array
+
+from sidecar import sidecar_path, atomic_write
+
+# .todoscript/offsets.idx is an array('Q'): the todos file's (mtime_ns, size)
+# followed by the byte offset of every line. A header that no longer matches
+# the file means the index is stale and gets rebuilt.
+
+INDEX_NAME = 'offsets.idx'
+HEADER_ITEMS = 2
+
+# abspath -> (signature, offsets), so repeated lookups skip reading the index
+_cache = {}
+
+
+def index_path(file_path, create=False):
+    return sidecar_path(file_path, INDEX_NAME, create)
+
+
+def file_signature(file_path):
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def scan_offsets(file_path):
+    offsets = array('Q')
+    offset = 0
+
+    with open(file_path, 'rb') as file:
+        for line in file:
+            offsets.append(offset)
+            offset += len(line)
+
+    return offsets
+
+
+def read_header(file_path):
+    header = array('Q')
+
+    try:
+        with open(index_path(file_path), 'rb') as file:
+            header.fromfile(file, HEADER_ITEMS)
+    except (FileNotFoundError, EOFError):
+        return None
+
+    return tuple(header)
+
+
+def is_fresh(file_path):
+    return read_header(file_path) == file_signature(file_path)
+
+
+def save_offsets(file_path, offsets):
+    header = array('Q', file_signature(file_path))
+
+    def write(file):
+        header.tofile(file)
+        offsets.tofile(file)
+
+    atomic_write(index_path(file_path, create=True), write, mode='wb')
+    _cache[os.path.abspath(file_path)] = (tuple(header), offsets)
+
+
+def touch(file_path):
+    '''
+        Re-stamps the header after a write that kept every offset unchanged.
+    '''
+    signature = file_signature(file_path)
+
+    try:
+        with open(index_path(file_path), 'r+b') as file:
+            array('Q', signature).tofile(file)
+    except FileNotFoundError:
+        return
+
+    key = os.path.abspath(file_path)
+    if key in _cache:
+        _cache[key] = (signature, _cache[key][1])
+
+
+def append_offsets(file_path, new_offsets):
+    '''
+        Adds the offsets of appended lines to an index that was fresh before
+        the append. The header is stamped last, so an interrupted append
+        leaves a stale index rather than a wrong one.
+    '''
+    _cache.pop(os.path.abspath(file_path), None)
+
+    with open(index_path(file_path), 'r+b') as file:
+        file.seek(0, os.SEEK_END)
+        new_offsets.tofile(file)
+        file.seek(0)
+        array('Q', file_signature(file_path)).tofile(file)
+
+
+def load_offsets(file_path):
+    path = index_path(file_path)
+
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return None
+
+    data = array('Q')
+    with open(path, 'rb') as file:
+        data.fromfile(file, size // data.itemsize)
+
+    if tuple(data[:HEADER_ITEMS]) != file_signature(file_path):
+        return None
+
+    return data[HEADER_ITEMS:]
+
+
+def get_offsets(file_path):
+    key = os.path.abspath(file_path)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == file_signature(file_path):
+        return cached[1]
+
+    offsets = load_offsets(file_path)
+
+    if offsets is None:
+        offsets = scan_offsets(file_path)
+        save_offsets(file_path, offsets)
+    else:
+        _cache[key] = (file_signature(file_path), offsets)
+
+    return offsets
+
+
+def read_line(file_path, line_number, offsets=None):
+    if offsets is None:
+        offsets = get_offsets(file_path)
+
+    if not 1 <= line_number <= len(offsets):
+        raise IndexError(f"Task {line_number} does not exist")
+
+    with open(file_path, 'rb') as file:
+        file.seek(offsets[line_number - 1])
+        return file.readline().decode('utf-8').rstrip("\r\n")
@@ -1,17 +1,29 @@
 import os
-import pathlib
-import json
-import time
-from yaspin import yaspin
-from utils import get_configuration, linebreak
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-config = get_configuration()
+import formats
+from config import save_configuration
+from discovery import discover
+from utils import get_configuration, linebreak, pause, progress_bar, spinner, timed
 
+# folder creation is I/O bound, so more threads than CPUs still help
+SCAFFOLD_WORKERS = 16
 
-root_directory = config['root_folder']
-parent_folder = config['parent_folder_name']
-file_format = config['file_format']
-folders = [f for f in os.listdir(root_directory)]
+
+def get_root_directory():
+    return get_configuration()['root_folder']
+
+
+def get_parent_folder():
+    return get_configuration()['parent_folder_name']
+
+
+def get_file_format():
+    return get_configuration()['file_format']
+
+
+def list_root_folders():
+    return list(discover())
 
 
 def configure(config, is_editing=False):
@@ -23,17 +35,12 @@ def configure(config, is_editing=False):
 
     # create config file
 
-    file_name = 'config.json'
-
-    json_object = json.dumps(config, indent=4)
-
     try:
-        with yaspin(text="Setting up config.json...", color='light_magenta') as sp:
+        with spinner("Setting up config.json...") as sp:
             try:
-                with open(file_name, 'w') as f:
-                    f.write(json_object)
+                save_configuration(config)
 
-                time.sleep(1)
+                pause(1)
                 sp.write("✅ Configurations saved.")
                 print(" ")
             except (IOError, PermissionError) as e:
@@ -45,9 +52,9 @@ def configure(config, is_editing=False):
     # create todos folder
     if not is_editing:
         try:
-            with yaspin(text=f'Creating {parent_folder_name} folder...', color='light_magenta') as sp:
+            with spinner(f'Creating {parent_folder_name} folder...') as sp:
                 os.makedirs(parent_folder_name)
-                time.sleep(2)
+                pause(2)
                 sp.write(f"✅ {parent_folder_name} folder created.")
         except FileExistsError:
             print(f"Folder {parent_folder_name} already exists:(")
@@ -57,45 +64,78 @@ def configure(config, is_editing=False):
             print(f"An error occured: {e}")
 
 
-def create_folder_if_not_exists(folder):
+def plan_scaffold(folders=None):
+    '''
+        Returns [(project, folder path, todos file path)] for every discovered
+        project that has no folder in the TODOs tree yet, from one listing of
+        the TODOs folder.
+    '''
+    parent_folder = get_parent_folder()
+    file_name = f'todos.{get_file_format()}'
+
+    try:
+        with os.scandir(parent_folder) as entries:
+            existing = {entry.name for entry in entries if entry.is_dir()}
+    except FileNotFoundError:
+        existing = set()
+
+    if folders is None:
+        folders = list_root_folders()
+
+    return [(folder, os.path.join(parent_folder, folder), os.path.join(parent_folder, folder, file_name))
+            for folder in folders if folder not in existing]
 
 
-    if not os.path.exists(folder):
-        folder_path = os.path.join(parent_folder, folder)
-        with yaspin(text=f'Creating {folder}...', color='light_magenta') as sp:
-            time.sleep(0.2)
-            os.makedirs(folder_path)
-            sp.write(f"🔵 Successfully created {folder} folder")
+def scaffold_project(folder_path, file_path):
+    os.makedirs(folder_path, exist_ok=True)
 
-        file_name = f'todos.{file_format}'
-        file_path = os.path.join(parent_folder, folder, file_name)
+    if not os.path.exists(file_path):
+        formats.write_lines(file_path, [])
 
-        with yaspin(text=f"Creating todo.{file_format}...", color="light_magenta")as sp:
-            with open(file_path, 'w') as f:
-                time.sleep(0.2)
-                sp.write(f"⚪ Successfully created {folder} todos.{file_format} file")
-    else:
-        pass
 
+def apply_scaffold(plan, max_workers=None):
+    '''
+        Creates the planned folders and empty todos files over a thread pool
+        behind one progress bar. Returns the number of projects created.
+    '''
+    created = 0
+
+    with progress_bar("Creating projects", len(plan)) as advance:
+        with ThreadPoolExecutor(max_workers=max_workers or SCAFFOLD_WORKERS) as executor:
+            jobs = {executor.submit(scaffold_project, folder_path, file_path): folder
+                    for folder, folder_path, file_path in plan}
+
+            for job in as_completed(jobs):
+                try:
+                    job.result()
+                    created += 1
+                except PermissionError:
+                    print(f"Permission denied: Unable to create '{jobs[job]}'")
+                except Exception as e:
+                    print(f"An error occured: {e}")
+                advance()
+
+    return created
+
+
+def create_tasks(dry_run=False, max_workers=None):
+    plan = plan_scaffold()
 
-def create_tasks():
     linebreak()
-    for folder in folders:
-        try:
-            create_folder_if_not_exists(folder)
-        except FileExistsError:
-            pass
-        except PermissionError:
-            print(f"Permission denied: Unable to create '{folder}'")
-        except Exception as e:
-            print(f"An error occured: {e}")
+    if dry_run:
+        for folder, folder_path, file_path in plan:
+            print(f"create {file_path}")
+        print(f"{len(plan)} projects to create")
+        return plan
 
+    with timed(f"Scaffolded {len(plan)} projects"):
+        created = apply_scaffold(plan, max_workers)
+
+    print(f"Created {created} of {len(plan)} projects")
+    return plan
 
-def get_folders():
-    data = []
-    for folder in folders:
-        data.append(folder)
 
-    return data
+def get_folders():
+    return list(list_root_folders())
 
 
@@ -0,0 +1,74 @@
+import bisect
+import re
+import shutil
+from functools import lru_cache
+
+from rich.text import Text
+
+from store import DUE_PATTERN, PRIORITY_PATTERN
+
+# Windowed rendering for the task screens: only the visible page of tasks
+# is styled and printed, and styled lines are cached between redraws.
+
+TAG_PATTERN = re.compile(r'@\w+')
+
+# rows taken by the header, progress line and menu around the task list
+RESERVED_ROWS = 14
+MIN_PAGE_SIZE = 5
+
+
+def page_size(config=None):
+    size = (config or {}).get('page_size')
+    if size:
+        return max(1, int(size))
+
+    return max(MIN_PAGE_SIZE, shutil.get_terminal_size().lines - RESERVED_ROWS)
+
+
+def page_count(total, size):
+    return max(1, -(-total // size))
+
+
+def clamp_page(page, total, size):
+    return min(max(page, 0), page_count(total, size) - 1)
+
+
+def page_items(items, page, size):
+    page = clamp_page(page, len(items), size)
+    return items[page * size:(page + 1) * size]
+
+
+def page_of_line(tasks, line_number, size):
+    '''
+        Returns the page showing line_number in tasks (sorted by line), or the
+        page of the next task after it when that line is filtered out.
+    '''
+    position = bisect.bisect_left([task.line for task in tasks], line_number)
+    return clamp_page(position // size, len(tasks), size)
+
+
+@lru_cache(maxsize=4096)
+def style_task(line, index):
+    completed = line[:3] == '[x]'
+    status = '✔' if completed else '☐'
+    prefix = f"  {index}. " if index > 9 else f"  {index}.  "
+
+    styled_line = Text(f"{prefix}{status} {line[3:]}")
+    body = len(prefix) + 2
+
+    styled_line.stylize('grey39' if completed else 'bright_white', body, len(styled_line))
+    styled_line.stylize("grey39", 0, len(prefix))
+
+    for match in TAG_PATTERN.finditer(line, 3):
+        start, end = match.span()
+        styled_line.stylize("yellow", body + start - 3, body + end - 3)
+
+    for match in DUE_PATTERN.finditer(line, 3):
+        start, end = match.span()
+        styled_line.stylize("cyan", body + start - 3, body + end - 3)
+
+    for match in PRIORITY_PATTERN.finditer(line, 3):
+        start, end = match.span()
+        styled_line.stylize("bold red", body + start - 3, body + end - 3)
+
+    return styled_line
@@ -0,0 +1,65 @@
+import bisect
+import heapq
+import itertools
+
+from workspace_index import WorkspaceIndex, get_index
+
+
+class PriorityIndex(WorkspaceIndex):
+    '''
+        Pending tasks with a priority marker, one list per project sorted by
+        (priority, line). The workspace-wide top K is a k-way heap merge of
+        those lists that stops after K tasks.
+    '''
+
+    name = 'priority'
+
+    def reset(self):
+        # project -> sorted [(priority, line, raw)]
+        self.projects = {}
+
+    def add_project(self, project, tasks):
+        entries = sorted((task.priority, task.line, task.raw) for task in tasks
+                         if task.priority is not None and task.status == 'pending')
+        if entries:
+            self.projects[project] = entries
+
+    def remove_project(self, project):
+        self.projects.pop(project, None)
+
+    def to_data(self):
+        return self.projects
+
+    def load_data(self, data):
+        self.projects = {project: [tuple(entry) for entry in entries]
+                         for project, entries in data.items()}
+
+    # queries
+
+    def entries(self, project, priority=None):
+        entries = self.projects.get(project, [])
+
+        if priority is not None:
+            start = bisect.bisect_left(entries, (priority,))
+            end = bisect.bisect_left(entries, (priority + 1,))
+            entries = entries[start:end]
+
+        return entries
+
+    def top(self, limit=10, priority=None):
+        '''
+            Returns [(priority, project, line, raw)] for the limit
+            highest-priority pending tasks of the workspace, optionally only
+            those of one priority.
+        '''
+        def stream(project):
+            for level, line, raw in self.entries(project, priority):
+                yield level, project, line, raw
+
+        streams = [stream(project) for project in sorted(self.projects)]
+
+        return list(itertools.islice(heapq.merge(*streams), limit))
+
+
+def get_priority_index(parent_folder):
+    return get_index(PriorityIndex, parent_folder)
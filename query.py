@@ -0,0 +1,203 @@
+import fnmatch
+import os
+import shlex
+from datetime import date
+
+from store import TaskStore, find_tasks_file, list_projects, parse_priority
+
+# Task queries such as
+#
+#     status:pending tag:@api -tag:@blocked text:"timeout" project:svc-*
+#
+# are parsed once into a project predicate and a task predicate. Terms are
+# ANDed and "-" negates a term. Bare @tag and !priority words are tag and
+# priority terms, any other bare word is a text term. Task checks run
+# cheapest first, so the expensive text checks only see tasks that passed
+# everything else.
+
+# relative cost of each task check, cheapest first
+COSTS = {'status': 0, 'priority': 0, 'due': 1, 'tag': 2, 'text': 3}
+
+STATUSES = ('pending', 'completed', 'all')
+
+
+def status_check(value):
+    if value not in STATUSES:
+        raise ValueError(f"Unknown status '{value}', expected one of {', '.join(STATUSES)}")
+
+    if value == 'all':
+        return lambda task: True
+    if value == 'pending':
+        # lines without a marker count as pending, as in TaskStore.filter
+        return lambda task: task.status != 'completed'
+    return lambda task: task.status == 'completed'
+
+
+def tag_check(value):
+    tag = value if value.startswith('@') else f'@{value}'
+    return lambda task: tag in task.tags
+
+
+def text_check(value):
+    needle = value.lower()
+    return lambda task: needle in task.text.lower()
+
+
+def priority_check(value):
+    if value == 'any':
+        return lambda task: task.priority is not None
+
+    priority = parse_priority(f'!{value}')
+    if priority is None:
+        raise ValueError(f"Unknown priority '{value}', expected high, medium, low, 1-9 or any")
+
+    return lambda task: task.priority == priority
+
+
+def due_check(value):
+    '''
+        due:any, due:overdue, or due:YYYY-MM-DD for tasks due on or before
+        that date.
+    '''
+    if value == 'any':
+        return lambda task: task.due is not None
+
+    if value == 'overdue':
+        # a completed task is never overdue
+        today = date.today().isoformat()
+        return lambda task: task.due is not None and task.due < today and task.status != 'completed'
+
+    try:
+        limit = date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"Unknown due date '{value}', expected any, overdue or YYYY-MM-DD")
+
+    return lambda task: task.due is not None and task.due <= limit
+
+
+CHECKS = {
+    'status': status_check,
+    'tag': tag_check,
+    'text': text_check,
+    'priority': priority_check,
+    'due': due_check,
+}
+
+
+def negate(check):
+    return lambda item: not check(item)
+
+
+def parse_query(query):
+    '''
+        Returns [(negated, key, value)] for a query string, or for a list of
+        terms that were already split (by the shell, for instance).
+    '''
+    try:
+        tokens = shlex.split(query) if isinstance(query, str) else list(query)
+    except ValueError as e:
+        raise ValueError(f"Invalid query: {e}")
+
+    terms = []
+    for token in tokens:
+        negated = token.startswith('-') and len(token) > 1
+        if negated:
+            token = token[1:]
+
+        key, separator, value = token.partition(':')
+        if separator and (key in CHECKS or key == 'project'):
+            pass
+        elif token.startswith('@') and len(token) > 1:
+            key, value = 'tag', token
+        elif token.startswith('!') and parse_priority(token) is not None:
+            key, value = 'priority', token[1:]
+        else:
+            # a bare word, or a colon that is part of the text
+            key, value = 'text', token
+
+        if not value:
+            raise ValueError(f"Missing value for '{key}:'")
+
+        terms.append((negated, key, value))
+
+    return terms
+
+
+def compile_query(query):
+    '''
+        Returns (project predicate, task predicate) for a query.
+    '''
+    project_checks = []
+    task_checks = []
+
+    for negated, key, value in parse_query(query):
+        if key == 'project':
+            check = (lambda pattern: lambda project: fnmatch.fnmatchcase(project, pattern))(value)
+            project_checks.append(negate(check) if negated else check)
+            continue
+
+        check = CHECKS[key](value)
+        task_checks.append((COSTS[key], negate(check) if negated else check))
+
+    # sorted() is stable, so terms of the same cost keep their query order
+    task_checks = tuple(check for cost, check in sorted(task_checks, key=lambda item: item[0]))
+    project_checks = tuple(project_checks)
+
+    def matches_project(project):
+        for check in project_checks:
+            if not check(project):
+                return False
+        return True
+
+    def matches_task(task):
+        for check in task_checks:
+            if not check(task):
+                return False
+        return True
+
+    return matches_project, matches_task
+
+
+def required_tags(query):
+    return [value if value.startswith('@') else f'@{value}'
+            for negated, key, value in parse_query(query) if key == 'tag' and not negated]
+
+
+def candidate_projects(parent_folder, query):
+    '''
+        Projects that can match query. A positive tag term narrows them to the
+        projects the tag index lists for every such tag.
+    '''
+    projects = list_projects(parent_folder)
+    tags = required_tags(query)
+
+    if tags:
+        from tag_index import get_tag_index
+
+        tag_index = get_tag_index(parent_folder)
+        for tag in tags:
+            tagged = tag_index.projects(tag)
+            projects = [project for project in projects if project in tagged]
+
+    return projects
+
+
+def run_query(parent_folder, query, projects=None):
+    '''
+        Yields (project, task) for every matching task, one project at a time.
+    '''
+    matches_project, matches_task = compile_query(query)
+
+    for project in projects if projects is not None else candidate_projects(parent_folder, query):
+        if not matches_project(project):
+            continue
+
+        try:
+            file_path = find_tasks_file(os.path.join(parent_folder, project))
+        except (IndexError, FileNotFoundError):
+            continue
+
+        # not get_store: a workspace query should not keep every project cached
+        for task in TaskStore(file_path).load().tasks:
+            if matches_task(task):
+                yield project, task
@@ -0,0 +1,93 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from summary import get_summary
+
+
+def count_tasks(file_path):
+    try:
+        counts = get_summary(file_path)
+    except FileNotFoundError:
+        return {'completed_tasks': 0, 'pending_tasks': 0, 'total_tasks': 0}
+
+    return {
+        'completed_tasks': counts['completed'],
+        'pending_tasks': counts['pending'],
+        'total_tasks': counts['total']
+    }
+
+
+def progress_percentage(completed_tasks, total_tasks):
+    return round((completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0
+
+
+def progress_stats(completed_tasks, total_tasks):
+    percentage_complete = progress_percentage(completed_tasks, total_tasks)
+    bars = int(percentage_complete / 10)
+    strokes = 10 - bars
+
+    graph = f"[{'[white]█[/white]'*bars}{'-'*strokes}]"
+
+    return f"{graph} {percentage_complete}% ({completed_tasks}/{total_tasks})"
+
+
+def build_table(reports_data):
+    from rich.table import Table
+
+    table = Table(title="Tasks")
+
+    table.add_column("ID", justify="center", style="bright_cyan")
+    table.add_column("Folder", justify="left", style="#e5c07b")
+    table.add_column("Progress", justify="left", style="#e5c07b")
+
+    for data in reports_data:
+        stats = progress_stats(data['completed_tasks'], data['total_tasks'])
+        table.add_row(str(data['id']), data['project'], stats)
+
+    return table
+
+
+def project_file(folder_path, file_name):
+    from store import find_tasks_file
+
+    try:
+        return find_tasks_file(folder_path)
+    except (IndexError, FileNotFoundError):
+        return os.path.join(folder_path, file_name)
+
+
+def collect_reports(folders, parent_folder, file_name='todos.txt', max_workers=None):
+    '''
+        Returns the reports_data list consumed by generate_reports from each
+        project's summary; only projects whose todos file changed outside
+        todoscript are re-read.
+    '''
+
+    from store import get_storage_mode
+
+    if get_storage_mode() == 'sqlite':
+        import sqlite_store
+
+        counts = sqlite_store.project_counts(parent_folder)
+        return [{
+            'id': index + 1,
+            'project': folder,
+            'completed_tasks': counts.get(folder, (0, 0))[0],
+            'pending_tasks': counts.get(folder, (0, 0))[1],
+            'total_tasks': sum(counts.get(folder, (0, 0)))
+        } for index, folder in enumerate(folders)]
+
+    paths = [project_file(os.path.join(parent_folder, folder), file_name)
+             for folder in folders]
+
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) + 4)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        all_counts = list(executor.map(count_tasks, paths))
+
+    return [{
+        'id': index + 1,
+        'project': folder,
+        **counts
+    } for index, (folder, counts) in enumerate(zip(folders, all_counts))]
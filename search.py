@@ -0,0 +1,229 @@
+import bisect
+import heapq
+import itertools
+import re
+
+from workspace_index import WorkspaceIndex, get_index
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# queries with more terms than this score every match instead of walking
+# the 3 ** terms tier combinations
+MAX_TIERED_TERMS = 4
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def task_text(raw):
+    return raw[3:] if raw[:3] in ('[x]', '[ ]') else raw
+
+
+class SearchIndex(WorkspaceIndex):
+    '''
+        Full-text index over the text of every task in the workspace.
+
+        Every word maps to the ids of the tasks containing it. Substring
+        queries go through a trigram index over the vocabulary (not over
+        every task), and short terms are matched as word prefixes.
+
+        On disk each word's ids are one space separated string, decoded
+        into a set only when a query or an update touches that word, so a
+        cold query does not pay for the whole vocabulary.
+    '''
+
+    name = 'search'
+    version = 2
+
+    def reset(self):
+        # id -> (project, line, raw)
+        self.documents = {}
+        self._project_documents = {}
+        # word -> set(ids), or the stored string until first use
+        self.postings = {}
+        self.next_id = 0
+        self._sorted_words = None
+        self._word_grams = None
+
+    def _vocabulary_changed(self):
+        self._sorted_words = None
+        self._word_grams = None
+
+    def _ids(self, word):
+        ids = self.postings.get(word)
+
+        if type(ids) is str:
+            ids = self.postings[word] = set(map(int, ids.split()))
+
+        return ids
+
+    def _length(self, document_id):
+        return len(self.documents[document_id][2])
+
+    @property
+    def project_documents(self):
+        if self._project_documents is None:
+            self._project_documents = {}
+            for document_id, (project, _, _) in self.documents.items():
+                self._project_documents.setdefault(project, []).append(document_id)
+
+        return self._project_documents
+
+    def add_project(self, project, tasks):
+        ids = []
+
+        for task in tasks:
+            if not task.text.strip():
+                continue
+
+            document_id = self.next_id
+            self.next_id += 1
+
+            self.documents[document_id] = (project, task.line, task.raw)
+            ids.append(document_id)
+
+            for word in set(WORD_PATTERN.findall(task.text.lower())):
+                word_ids = self._ids(word)
+                if word_ids is None:
+                    word_ids = self.postings[word] = set()
+                word_ids.add(document_id)
+
+        self.project_documents[project] = ids
+        self._vocabulary_changed()
+
+    def remove_project(self, project):
+        for document_id in self.project_documents.pop(project, []):
+            _, _, raw = self.documents.pop(document_id)
+
+            for word in set(WORD_PATTERN.findall(task_text(raw).lower())):
+                ids = self._ids(word)
+                if ids is None:
+                    continue
+
+                ids.discard(document_id)
+                if not ids:
+                    del self.postings[word]
+
+        self._vocabulary_changed()
+
+    def to_data(self):
+        return {
+            'next_id': self.next_id,
+            'documents': [[document_id, *document] for document_id, document in self.documents.items()],
+            'postings': {word: ids if type(ids) is str else ' '.join(map(str, sorted(ids)))
+                         for word, ids in self.postings.items()}
+        }
+
+    def load_data(self, data):
+        self.next_id = data['next_id']
+        self.documents = {document_id: (project, line, raw)
+                          for document_id, project, line, raw in data['documents']}
+        # built on the first update, a query never needs it
+        self._project_documents = None
+        self.postings = data['postings']
+        self._vocabulary_changed()
+
+    # queries
+
+    def _words_with_prefix(self, prefix):
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self.postings)
+
+        start = bisect.bisect_left(self._sorted_words, prefix)
+        for word in self._sorted_words[start:]:
+            if not word.startswith(prefix):
+                break
+            yield word
+
+    def _words_containing(self, fragment):
+        if self._word_grams is None:
+            self._word_grams = {}
+            for word in self.postings:
+                for gram in trigrams(word):
+                    self._word_grams.setdefault(gram, set()).add(word)
+
+        grams = sorted((self._word_grams.get(gram, set()) for gram in trigrams(fragment)), key=len)
+        candidates = set.intersection(*grams) if grams else set()
+
+        return [word for word in candidates if fragment in word]
+
+    def _match_term(self, term):
+        '''
+            Returns (exact, prefix, substring) id sets for one query term.
+        '''
+        exact = self._ids(term) or set()
+        prefix = set()
+        substring = set()
+
+        for word in self._words_with_prefix(term):
+            if word != term:
+                prefix |= self._ids(word)
+
+        if len(term) >= 3:
+            for word in self._words_containing(term):
+                if not word.startswith(term):
+                    substring |= self._ids(word)
+
+        return exact, prefix - exact, substring - exact - prefix
+
+    def search(self, query, limit=20):
+        '''
+            Returns up to limit (score, project, line, raw) tuples matching
+            every term in query, best matches first. Exact word matches rank
+            above prefix matches, which rank above substring matches; shorter
+            tasks win ties.
+        '''
+        terms = []
+        for term in query.lower().split():
+            terms.extend(WORD_PATTERN.findall(term))
+
+        if not terms:
+            return []
+
+        tiers = [self._match_term(term) for term in terms]
+        length = self._length
+
+        if len(tiers) > MAX_TIERED_TERMS:
+            return self._score_all(tiers, limit)
+
+        # every combination of per-term tiers, grouped by total score
+        groups = {}
+        for combination in itertools.product(range(3), repeat=len(tiers)):
+            total = sum(3 - tier for tier in combination)
+            groups.setdefault(total, []).append(combination)
+
+        results = []
+        for total in sorted(groups, reverse=True):
+            need = limit - len(results)
+            if need <= 0:
+                break
+
+            group = set()
+            for combination in groups[total]:
+                sets = sorted((tiers[term][tier] for term, tier in enumerate(combination)), key=len)
+                if sets[0]:
+                    group |= set.intersection(*sets)
+
+            results.extend((total, *self.documents[document_id])
+                           for document_id in heapq.nsmallest(need, group, key=length))
+
+        return results
+
+    def _score_all(self, tiers, limit):
+        matches = set.intersection(*(exact | prefix | substring for exact, prefix, substring in tiers))
+
+        def score(document_id):
+            total = 0
+            for exact, prefix, _ in tiers:
+                total += 3 if document_id in exact else 2 if document_id in prefix else 1
+            return total
+
+        scored = [(score(document_id), -self._length(document_id), document_id) for document_id in matches]
+        best = heapq.nlargest(limit, scored)
+
+        return [(total, *self.documents[document_id]) for total, _, document_id in best]
+
+
+def get_search_index(parent_folder):
+    return get_index(SearchIndex, parent_folder)
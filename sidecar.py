@@ -0,0 +1,59 @@
+import os
+import tempfile
+
+# per-project metadata lives next to the todos file in a hidden folder so it
+# never shows up as a project file
+SIDECAR_FOLDER = '.todoscript'
+
+
+def sidecar_path(file_path, name, create=False):
+    folder = os.path.join(os.path.dirname(os.path.abspath(file_path)), SIDECAR_FOLDER)
+    if create:
+        os.makedirs(folder, exist_ok=True)
+
+    return os.path.join(folder, name)
+
+
+def workspace_path(parent_folder, name, create=False):
+    folder = os.path.join(os.path.abspath(parent_folder), SIDECAR_FOLDER)
+    if create:
+        os.makedirs(folder, exist_ok=True)
+
+    return os.path.join(folder, name)
+
+
+# read once at import: os.umask can only be read by setting it
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def file_mode(file_path):
+    '''
+        The permissions to give a rewritten file_path: those it has, or what
+        open() would give a new file under the process umask.
+    '''
+    try:
+        return os.stat(file_path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_umask
+
+
+def atomic_write(file_path, write, mode='w', encoding='utf-8'):
+    '''
+        Calls write(file) on a temporary file in the same folder and moves it
+        over file_path once it has been written completely.
+    '''
+    kwargs = {} if 'b' in mode else {'encoding': encoding}
+
+    try:
+        with tempfile.NamedTemporaryFile(mode, delete=False, dir=os.path.dirname(os.path.abspath(file_path)), **kwargs) as temp_file:
+            temp_file_name = temp_file.name
+            write(temp_file)
+
+        # NamedTemporaryFile creates 0600 files
+        os.chmod(temp_file_name, file_mode(file_path))
+        os.replace(temp_file_name, file_path)
+    except Exception:
+        if 'temp_file_name' in locals():
+            os.unlink(temp_file_name)
+        raise
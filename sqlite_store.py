@@ -0,0 +1,319 @@
+import os
+import sqlite3
+import threading
+from contextlib import ExitStack
+
+import formats
+from sidecar import workspace_path
+
+# Optional SQLite backend, enabled with "storage": "sqlite" in config.json.
+# Tasks live in <parent>/.todoscript/todos.db; each project's todos file
+# stays in place (empty) so project folders keep working as before.
+
+DATABASE_NAME = 'todos.db'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT,
+    raw TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_project_position ON tasks (project, position);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, project);
+CREATE TABLE IF NOT EXISTS tags (
+    task_id INTEGER NOT NULL REFERENCES tasks (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags (tag);
+CREATE INDEX IF NOT EXISTS idx_tags_task ON tags (task_id);
+CREATE TABLE IF NOT EXISTS revisions (
+    project TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL
+);
+'''
+
+_local = threading.local()
+
+
+def reset_connections():
+    '''
+        Forgets the connections inherited from a parent process. SQLite
+        connections must not be used across fork(), so pool workers call
+        this before opening their own.
+    '''
+    global _local
+    _local = threading.local()
+
+
+def database_path(parent_folder, create=False):
+    return workspace_path(parent_folder, DATABASE_NAME, create)
+
+
+def connect(parent_folder):
+    path = database_path(parent_folder, create=True)
+
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    connection = connections.get(path)
+    if connection is None:
+        connection = sqlite3.connect(path)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA foreign_keys=ON')
+        connection.executescript(SCHEMA)
+        connections[path] = connection
+
+    return connection
+
+
+def locate(file_path):
+    '''
+        Returns (parent_folder, project) for a project's todos file path.
+    '''
+    folder_path = os.path.dirname(os.path.abspath(file_path))
+    return os.path.dirname(folder_path), os.path.basename(folder_path)
+
+
+def status_of(raw):
+    marker = raw[:3]
+    if marker == '[x]':
+        return 'completed'
+    if marker == '[ ]':
+        return 'pending'
+    return None
+
+
+def tags_of(raw):
+    return list(dict.fromkeys(word for word in raw.split() if word.startswith('@')))
+
+
+# reads
+
+
+def revision(parent_folder, project):
+    row = connect(parent_folder).execute(
+        'SELECT revision FROM revisions WHERE project = ?', (project,)).fetchone()
+    return row[0] if row else 0
+
+
+def read_lines(parent_folder, project):
+    rows = connect(parent_folder).execute(
+        'SELECT raw FROM tasks WHERE project = ? ORDER BY position', (project,))
+    return [raw for (raw,) in rows]
+
+
+def iter_lines(parent_folder, project):
+    rows = connect(parent_folder).execute(
+        'SELECT raw FROM tasks WHERE project = ? ORDER BY position', (project,))
+    for (raw,) in rows:
+        yield raw
+
+
+def read_line(parent_folder, project, position):
+    row = connect(parent_folder).execute(
+        'SELECT raw FROM tasks WHERE project = ? AND position = ?', (project, position)).fetchone()
+    if row is None:
+        raise IndexError(f"Task {position} does not exist")
+    return row[0]
+
+
+def project_counts(parent_folder):
+    '''
+        Returns {project: (completed, pending)} in a single GROUP BY query.
+    '''
+    rows = connect(parent_folder).execute('''
+        SELECT project,
+               SUM(status = 'completed'),
+               SUM(status = 'pending')
+        FROM tasks
+        GROUP BY project
+    ''')
+    return {project: (completed or 0, pending or 0) for project, completed, pending in rows}
+
+
+def projects(parent_folder):
+    rows = connect(parent_folder).execute('SELECT DISTINCT project FROM tasks ORDER BY project')
+    return [project for (project,) in rows]
+
+
+# writes
+
+
+def insert_task(connection, project, position, raw):
+    cursor = connection.execute(
+        'INSERT INTO tasks (project, position, status, raw) VALUES (?, ?, ?, ?)',
+        (project, position, status_of(raw), raw))
+    connection.executemany('INSERT INTO tags (task_id, tag) VALUES (?, ?)',
+                           [(cursor.lastrowid, tag) for tag in tags_of(raw)])
+
+
+def replace_task(connection, task_id, raw):
+    connection.execute('UPDATE tasks SET status = ?, raw = ? WHERE id = ?',
+                       (status_of(raw), raw, task_id))
+    connection.execute('DELETE FROM tags WHERE task_id = ?', (task_id,))
+    connection.executemany('INSERT INTO tags (task_id, tag) VALUES (?, ?)',
+                           [(task_id, tag) for tag in tags_of(raw)])
+
+
+def bump_revision(connection, project):
+    connection.execute('''
+        INSERT INTO revisions (project, revision) VALUES (?, 1)
+        ON CONFLICT (project) DO UPDATE SET revision = revision + 1
+    ''', (project,))
+
+
+def apply(parent_folder, project, record):
+    from journal import apply_to_line
+
+    connection = connect(parent_folder)
+
+    with connection:
+        if record['op'] == 'add':
+            row = connection.execute(
+                'SELECT COALESCE(MAX(position), 0) FROM tasks WHERE project = ?', (project,)).fetchone()
+            for offset, raw in enumerate(record['lines'], start=1):
+                insert_task(connection, project, row[0] + offset, raw)
+
+            bump_revision(connection, project)
+            return
+
+        positions = sorted(record['lines']) if 'lines' in record else [record['line']]
+        placeholders = ','.join('?' * len(positions))
+        rows = connection.execute(
+            f'SELECT id, position, raw FROM tasks WHERE project = ? AND position IN ({placeholders})',
+            (project, *positions)).fetchall()
+
+        if 'lines' in record:
+            record = {**record, 'lines': set(record['lines'])}
+
+        deleted = []
+        for task_id, position, raw in rows:
+            new_raw = apply_to_line(record, position, raw)
+            if new_raw is None:
+                deleted.append(task_id)
+            elif new_raw != raw:
+                replace_task(connection, task_id, new_raw)
+
+        if deleted:
+            connection.executemany('DELETE FROM tasks WHERE id = ?', [(task_id,) for task_id in deleted])
+            renumber(connection, project, min(positions))
+
+        bump_revision(connection, project)
+
+
+def renumber(connection, project, start):
+    rows = connection.execute(
+        'SELECT id FROM tasks WHERE project = ? AND position >= ? ORDER BY position',
+        (project, start)).fetchall()
+
+    # ascending order only ever moves a row into a slot that is already free
+    connection.executemany('UPDATE tasks SET position = ? WHERE id = ?',
+                           [(start + offset, task_id) for offset, (task_id,) in enumerate(rows)])
+
+
+def replace_project(parent_folder, project, lines):
+    connection = connect(parent_folder)
+
+    with connection:
+        connection.execute('DELETE FROM tasks WHERE project = ?', (project,))
+        for position, raw in enumerate(lines, start=1):
+            insert_task(connection, project, position, raw)
+        bump_revision(connection, project)
+
+
+# migrations
+#
+# Both directions copy every project first, switch "storage" in config.json,
+# and only then empty the source, so an interrupted migration leaves every
+# task readable from the backend that config.json still names.
+
+
+def set_storage(storage):
+    from config import load_configuration, save_configuration
+
+    save_configuration({**load_configuration(), 'storage': storage})
+
+
+def migrate_to_sqlite(parent_folder, force=False):
+    '''
+        Copies every project's todos file into the database, switches the
+        storage to sqlite and then empties the files. Projects that already
+        have rows in the database are refused unless force is set. Returns
+        the number of projects migrated.
+    '''
+    import journal
+    from store import find_tasks_file, list_projects, read_text
+
+    file_paths = {}
+    for project in list_projects(parent_folder):
+        try:
+            file_paths[project] = find_tasks_file(os.path.join(parent_folder, project))
+        except IndexError:
+            continue
+
+    with ExitStack() as stack:
+        # no other process may write a todos file between its copy and truncation
+        for file_path in file_paths.values():
+            stack.enter_context(journal.get_lock(file_path))
+
+        existing = [project for project in projects(parent_folder) if project in file_paths]
+        if existing and not force:
+            raise ValueError(f"The database already has tasks for {', '.join(existing)}; "
+                             "use --force to replace them")
+
+        for project, file_path in file_paths.items():
+            journal.compact(file_path)
+            lines, _ = read_text(file_path)
+            replace_project(parent_folder, project, lines)
+
+        set_storage('sqlite')
+
+        for file_path in file_paths.values():
+            # an empty document of the project's format, not a 0-byte file
+            formats.write_lines(file_path, [])
+
+    return len(file_paths)
+
+
+def migrate_to_text(parent_folder, force=False):
+    '''
+        Writes every project in the database back to its todos file,
+        switches the storage to text and then deletes the projects from the
+        database. Todos files that are not empty are refused unless force is
+        set. Returns the number of projects migrated.
+    '''
+    from store import find_tasks_file
+
+    file_paths = {}
+    for project in projects(parent_folder):
+        folder_path = os.path.join(parent_folder, project)
+
+        try:
+            file_paths[project] = find_tasks_file(folder_path)
+        except (IndexError, FileNotFoundError):
+            file_paths[project] = os.path.join(folder_path, 'todos.txt')
+
+    # an empty json, md, csv or yaml document still has a few bytes
+    existing = [project for project, file_path in file_paths.items()
+                if os.path.exists(file_path) and next(formats.read_lines(file_path), None) is not None]
+    if existing and not force:
+        raise ValueError(f"The todos files of {', '.join(existing)} are not empty; "
+                         "use --force to overwrite them")
+
+    for project, file_path in file_paths.items():
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        formats.write_lines(file_path, read_lines(parent_folder, project))
+
+    set_storage('text')
+
+    connection = connect(parent_folder)
+    with connection:
+        for project in file_paths:
+            connection.execute('DELETE FROM tasks WHERE project = ?', (project,))
+            bump_revision(connection, project)
+
+    return len(file_paths)
@@ -0,0 +1,599 @@
+import heapq
+import os
+import re
+from array import array
+from datetime import date
+
+import formats
+import journal
+import line_index
+import sqlite_store
+import summary
+from config import load_configuration
+from sidecar import atomic_write
+
+DUE_PATTERN = re.compile(r'(?<!\S)due:(\d{4}-\d{2}-\d{2})(?!\S)')
+PRIORITY_PATTERN = re.compile(r'(?<!\S)!(high|medium|low|[1-9])(?!\S)')
+
+# 1 is the highest priority
+PRIORITY_NAMES = {'high': 1, 'medium': 2, 'low': 3}
+
+# in-memory task model
+
+
+class Task:
+    __slots__ = ('line', 'status', 'text', 'tags', 'raw', 'due', 'priority')
+
+    def __init__(self, line, status, text, tags, raw, due=None, priority=None):
+        self.line = line
+        self.status = status
+        self.text = text
+        self.tags = tags
+        self.raw = raw
+        self.due = due
+        self.priority = priority
+
+    @property
+    def is_task(self):
+        return self.status is not None
+
+    @property
+    def completed(self):
+        return self.status == 'completed'
+
+
+def parse_line(raw, line_number):
+    marker = raw[:3]
+
+    if marker == '[x]':
+        status = 'completed'
+    elif marker == '[ ]':
+        status = 'pending'
+    else:
+        status = None
+
+    text = raw[3:] if status else raw
+    tags = [word for word in raw.split() if word.startswith("@")]
+    due = parse_due(raw) if 'due:' in raw else None
+    priority = parse_priority(raw) if '!' in raw else None
+
+    return Task(line_number, status, text, tags, raw, due, priority)
+
+
+def parse_due(raw):
+    '''
+        Returns the ISO date of a "due:YYYY-MM-DD" word in raw, or None.
+        ISO strings sort like the dates they name.
+    '''
+    match = DUE_PATTERN.search(raw)
+    if match is None:
+        return None
+
+    try:
+        date.fromisoformat(match.group(1))
+    except ValueError:
+        return None
+
+    return match.group(1)
+
+
+def parse_priority(raw):
+    '''
+        Returns the priority of the first "!high"/"!medium"/"!low" or "!1"-"!9"
+        word in raw as a number (1 is highest), or None.
+    '''
+    match = PRIORITY_PATTERN.search(raw)
+    if match is None:
+        return None
+
+    value = match.group(1)
+    return PRIORITY_NAMES.get(value) or int(value)
+
+
+def stat_signature(file_path):
+    '''
+        (mtime_ns, size) of the todos file, extended with the journal's when
+        one is waiting to be replayed. With the SQLite backend it is the
+        project's revision counter instead.
+    '''
+    if get_storage_mode() == 'sqlite':
+        return ('sqlite', sqlite_store.revision(*sqlite_store.locate(file_path)))
+
+    stat = os.stat(file_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    try:
+        log_stat = os.stat(journal.journal_path(file_path))
+        return signature + (log_stat.st_mtime_ns, log_stat.st_size)
+    except FileNotFoundError:
+        return signature
+
+
+def is_line_based(file_path):
+    return formats.format_of(file_path) == 'txt'
+
+
+def read_text(file_path):
+    '''
+        Returns (lines, offsets) for a todos file in any format, with any
+        pending journal replayed on top. Byte offsets are only available for
+        plain .txt files without a journal; otherwise offsets is None.
+    '''
+    if not is_line_based(file_path):
+        lines = list(formats.read_lines(file_path))
+        offsets = None
+    else:
+        lines = []
+        offsets = array('Q')
+        offset = 0
+
+        with open(file_path, 'rb') as file:
+            for line in file:
+                offsets.append(offset)
+                offset += len(line)
+                lines.append(line.decode('utf-8').rstrip("\r\n"))
+
+    if os.path.exists(journal.journal_path(file_path)):
+        lines = journal.replay(lines, file_path)
+        offsets = None
+
+    return lines, offsets
+
+
+class TaskStore:
+    '''
+        Parses a todos file once and keeps the result in memory until the
+        file's mtime or size changes.
+    '''
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.tasks = []
+        # byte offset of every line, or None while a journal is replayed on top
+        self.offsets = None
+        self._signature = None
+
+    def _stat_signature(self):
+        return stat_signature(self.file_path)
+
+    def is_stale(self):
+        try:
+            return self._stat_signature() != self._signature
+        except FileNotFoundError:
+            return True
+
+    def load(self):
+        if not self.is_stale():
+            return self
+
+        if get_storage_mode() == 'sqlite':
+            signature = self._stat_signature()
+            lines = sqlite_store.read_lines(*sqlite_store.locate(self.file_path))
+            offsets = None
+        else:
+            with journal.get_lock(self.file_path):
+                signature = self._stat_signature()
+                lines, offsets = read_text(self.file_path)
+
+                if offsets is not None and not line_index.is_fresh(self.file_path):
+                    line_index.save_offsets(self.file_path, offsets)
+
+        self.tasks = [parse_line(line, index)
+                      for index, line in enumerate(lines, start=1)]
+
+        self.offsets = offsets
+        self._signature = signature
+        return self
+
+    def patched(self, line_numbers):
+        '''
+            Refreshes the given lines after their status bytes were patched in
+            place, without re-parsing the rest of the file.
+        '''
+        with open(self.file_path, 'rb') as file:
+            for line_number in line_numbers:
+                file.seek(self.offsets[line_number - 1])
+                line = file.readline().decode('utf-8').rstrip("\r\n")
+                self.tasks[line_number - 1] = parse_line(line, line_number)
+
+        self._signature = self._stat_signature()
+
+    def counts(self):
+        completed = 0
+        pending = 0
+
+        for task in self.tasks:
+            if task.status == 'completed':
+                completed += 1
+            elif task.status == 'pending':
+                pending += 1
+
+        return {
+            'completed': completed,
+            'pending': pending,
+            'total': completed + pending,
+            'lines': len(self.tasks)
+        }
+
+    def tags(self):
+        return list(dict.fromkeys(tag for task in self.tasks for tag in task.tags))
+
+    def lines(self):
+        return [task.raw.strip() for task in self.tasks]
+
+    def get(self, line_number):
+        return self.tasks[line_number - 1]
+
+    def filter(self, tasks_filter=''):
+        if tasks_filter in ('', 'all'):
+            return list(self.tasks)
+
+        if ' ' in tasks_filter or ':' in tasks_filter:
+            return self.query(tasks_filter)
+
+        if tasks_filter.startswith("@"):
+            return [task for task in self.tasks if tasks_filter in task.tags]
+
+        if tasks_filter == '!top':
+            return self.top_priority()
+
+        if tasks_filter.startswith("!"):
+            # like the priority index, a priority filter lists pending tasks
+            priority = parse_priority(tasks_filter)
+            return [task for task in self.tasks
+                    if priority and task.priority == priority and task.status == 'pending']
+
+        if tasks_filter in ('completed', 'pending'):
+            return [task for task in self.tasks if task.status == tasks_filter
+                    or (tasks_filter == 'pending' and task.status is None)]
+
+        return self.query(tasks_filter)
+
+    def top_priority(self, limit=None):
+        '''
+            Returns the pending prioritized tasks, highest priority first and
+            in file order within a priority, at most limit of them.
+        '''
+        tasks = (task for task in self.tasks if task.priority is not None and task.status == 'pending')
+        key = lambda task: (task.priority, task.line)
+
+        if limit is None:
+            return sorted(tasks, key=key)
+
+        return heapq.nsmallest(limit, tasks, key=key)
+
+    def query(self, query):
+        '''
+            Returns the tasks matching a query (see query.py). Raises
+            ValueError for an invalid query.
+        '''
+        from query import compile_query
+
+        matches_project, matches_task = compile_query(query)
+        if not matches_project(os.path.basename(os.path.dirname(os.path.abspath(self.file_path)))):
+            return []
+
+        return [task for task in self.tasks if matches_task(task)]
+
+
+_stores = {}
+
+
+def get_store(file_path):
+    file_path = os.path.abspath(file_path)
+
+    store = _stores.get(file_path)
+    if store is None:
+        store = _stores[file_path] = TaskStore(file_path)
+
+    return store.load()
+
+
+def list_projects(parent_folder):
+    return sorted(f for f in os.listdir(parent_folder)
+                  if os.path.isdir(os.path.join(parent_folder, f)) and not f.startswith('.'))
+
+
+def find_tasks_file(folder_path):
+    files = sorted(f for f in os.listdir(folder_path)
+                   if os.path.isfile(os.path.join(folder_path, f)))
+    todos = [f for f in files if f.startswith('todos.')]
+
+    return os.path.join(folder_path, (todos or files)[0])
+
+
+# mutations
+#
+# Every mutation is described as a journal record. In the default "text"
+# storage mode the record is applied by rewriting the todos file; in
+# "journal" mode it is appended to the project's journal instead.
+
+
+def get_storage_mode():
+    config = load_configuration()
+    return (config and config.get('storage')) or 'text'
+
+
+COPY_CHUNK = 1024 * 1024
+
+
+def copy_bytes(source, target, start, end=None):
+    source.seek(start)
+    remaining = None if end is None else end - start
+
+    while remaining is None or remaining > 0:
+        chunk = source.read(COPY_CHUNK if remaining is None else min(COPY_CHUNK, remaining))
+        if not chunk:
+            break
+        target.write(chunk)
+        if remaining is not None:
+            remaining -= len(chunk)
+
+
+def append_lines(file_path, lines):
+    fresh = line_index.is_fresh(file_path)
+
+    new_offsets = array('Q')
+    with open(file_path, 'a+b') as file:
+        position = file.seek(0, os.SEEK_END)
+
+        # a last line without a newline would swallow the first appended one
+        if position:
+            file.seek(position - 1)
+            if file.read(1) != b'\n':
+                file.write(b'\n')
+                position += 1
+
+        for line in lines:
+            data = f"{line}\n".encode('utf-8')
+            new_offsets.append(position)
+            file.write(data)
+            position += len(data)
+
+    if fresh:
+        line_index.append_offsets(file_path, new_offsets)
+
+
+def rewrite_lines(file_path, record):
+    '''
+        Applies a record by seeking straight to the lines it touches. The
+        untouched byte ranges in between are copied verbatim and the line
+        index is shifted instead of rebuilt.
+    '''
+    offsets = line_index.get_offsets(file_path)
+    affected = sorted(record['lines']) if 'lines' in record else [record['line']]
+    affected = [line_number for line_number in affected if 1 <= line_number <= len(offsets)]
+
+    if 'lines' in record:
+        record = {**record, 'lines': set(record['lines'])}
+
+    new_offsets = array('Q')
+    changes = []
+
+    def write(temp_file):
+        with open(file_path, 'rb') as file:
+            position = 0
+            previous = 0
+            shift = 0
+
+            for line_number in affected:
+                start = offsets[line_number - 1]
+                copy_bytes(file, temp_file, position, start)
+                new_offsets.extend(offset + shift for offset in offsets[previous:line_number - 1])
+
+                file.seek(start)
+                raw = file.readline()
+                old_line = raw.decode('utf-8').rstrip("\r\n")
+                new_line = journal.apply_to_line(record, line_number, old_line)
+                changes.append((old_line, new_line))
+
+                if new_line is None:
+                    shift -= len(raw)
+                else:
+                    data = f"{new_line}\n".encode('utf-8')
+                    new_offsets.append(start + shift)
+                    temp_file.write(data)
+                    shift += len(data) - len(raw)
+
+                position = start + len(raw)
+                previous = line_number
+
+            copy_bytes(file, temp_file, position)
+            new_offsets.extend(offset + shift for offset in offsets[previous:])
+
+    atomic_write(file_path, write, mode='wb')
+    line_index.save_offsets(file_path, new_offsets)
+
+    return changes
+
+
+def line_changes(record, lines):
+    '''
+        Returns the (old, new) line pairs a record makes against lines, for
+        updating the project summary.
+    '''
+    if record['op'] == 'add':
+        return [(None, line) for line in record['lines']]
+
+    affected = sorted(record['lines']) if 'lines' in record else [record['line']]
+    return [(lines[line_number - 1], journal.apply_to_line(record, line_number, lines[line_number - 1]))
+            for line_number in affected if 1 <= line_number <= len(lines)]
+
+
+def current_signature(file_path):
+    try:
+        return stat_signature(file_path)
+    except FileNotFoundError:
+        return None
+
+
+def apply(file_path, record):
+    config = load_configuration() or {}
+
+    if get_storage_mode() == 'sqlite':
+        # reports come straight from the database, no summary to keep
+        sqlite_store.apply(*sqlite_store.locate(file_path), record)
+        return
+
+    with journal.get_lock(file_path):
+        if get_storage_mode() == 'journal':
+            before = current_signature(file_path)
+
+            # the old lines are only known when the store already has them
+            store = _stores.get(os.path.abspath(file_path))
+            if record['op'] == 'add':
+                changes = line_changes(record, [])
+            elif store is not None and not store.is_stale():
+                changes = line_changes(record, [task.raw for task in store.tasks])
+            else:
+                changes = None
+
+            journal.append(file_path, record, config.get(
+                'journal_compact_bytes', journal.DEFAULT_COMPACT_BYTES))
+            summary.update(file_path, before, changes)
+            return
+
+        # fold any journal left over from journal mode into the base file
+        journal.compact(file_path)
+        before = current_signature(file_path)
+
+        if not is_line_based(file_path):
+            lines = list(formats.read_lines(file_path))
+            changes = line_changes(record, lines)
+            formats.write_lines(file_path, journal.apply_record(lines, record))
+        elif record['op'] == 'add':
+            append_lines(file_path, record['lines'])
+            changes = line_changes(record, [])
+        else:
+            changes = rewrite_lines(file_path, record)
+
+        summary.update(file_path, before, changes)
+
+
+def add_task(file_path, text, completed=False):
+    status = '[x]' if completed else '[ ]'
+    apply(file_path, {'op': 'add', 'lines': [f'{status} {text}']})
+
+
+def add_tasks(file_path, texts, completed=False):
+    status = '[x]' if completed else '[ ]'
+    apply(file_path, {'op': 'add', 'lines': [f'{status} {text}' for text in texts]})
+
+
+def is_seekable(file_path):
+    '''
+        True when tasks can be read straight from the todos file by offset:
+        text storage, a line based format and no journal left over from
+        journal storage waiting to be replayed.
+    '''
+    return (get_storage_mode() == 'text' and is_line_based(file_path)
+            and not os.path.exists(journal.journal_path(file_path)))
+
+
+def read_task(file_path, line_number):
+    mode = get_storage_mode()
+
+    if mode != 'sqlite' and not is_seekable(file_path):
+        # no byte offsets to seek with, read through the cached parse
+        store = get_store(file_path)
+        if not 1 <= line_number <= len(store.tasks):
+            raise IndexError(f"Task {line_number} does not exist")
+        return store.get(line_number)
+
+    if mode == 'sqlite':
+        return parse_line(sqlite_store.read_line(*sqlite_store.locate(file_path), line_number), line_number)
+
+    return parse_line(line_index.read_line(file_path, line_number), line_number)
+
+
+def read_tasks(file_path, line_numbers):
+    '''
+        Returns the tasks at line_numbers, loading the line offsets and
+        opening the file once. Lines that no longer exist are skipped.
+    '''
+    if not is_seekable(file_path):
+        store = get_store(file_path)
+        return [store.get(line_number) for line_number in line_numbers
+                if 1 <= line_number <= len(store.tasks)]
+
+    offsets = line_index.get_offsets(file_path)
+    tasks = []
+
+    with open(file_path, 'rb') as file:
+        for line_number in line_numbers:
+            if 1 <= line_number <= len(offsets):
+                file.seek(offsets[line_number - 1])
+                tasks.append(parse_line(file.readline().decode('utf-8').rstrip("\r\n"), line_number))
+
+    return tasks
+
+
+def patch_status(file_path, line_numbers, completed):
+    '''
+        Overwrites the three status bytes of each line in place. Returns
+        False when the line offsets are not usable and a rewrite is needed.
+    '''
+    if get_storage_mode() != 'text' or not is_line_based(file_path):
+        return False
+
+    marker = b'[x]' if completed else b'[ ]'
+
+    with journal.get_lock(file_path):
+        journal.compact(file_path)
+
+        store = _stores.get(os.path.abspath(file_path))
+        store_is_current = store is not None and not store.is_stale()
+
+        offsets = line_index.get_offsets(file_path)
+        before = current_signature(file_path)
+
+        patched = []
+        changes = []
+        with open(file_path, 'r+b') as file:
+            for line_number in sorted(set(line_numbers)):
+                if not 1 <= line_number <= len(offsets):
+                    continue
+
+                file.seek(offsets[line_number - 1])
+                current = file.read(3)
+
+                if current in (b'[x]', b'[ ]') and current != marker:
+                    file.seek(offsets[line_number - 1])
+                    file.write(marker)
+                    patched.append(line_number)
+                    # tags are untouched, the markers alone carry the change
+                    changes.append((current.decode(), marker.decode()))
+
+        if patched:
+            line_index.touch(file_path)
+            if store_is_current:
+                store.patched(patched)
+            summary.update(file_path, before, changes)
+
+    return True
+
+
+def set_status(file_path, line_numbers, completed):
+    if patch_status(file_path, line_numbers, completed):
+        return
+
+    apply(file_path, {'op': 'status', 'lines': sorted(set(line_numbers)),
+                      'status': '[x]' if completed else '[ ]'})
+
+
+def edit_task(file_path, line_number, text):
+    apply(file_path, {'op': 'edit', 'line': line_number, 'text': text})
+
+
+def add_tags(file_path, line_numbers, tags):
+    tags = [f"@{tag.strip().lstrip('@')}" for tag in tags if tag.strip()]
+    if tags:
+        apply(file_path, {'op': 'tags', 'lines': sorted(set(line_numbers)), 'tags': tags})
+
+
+def delete_tasks(file_path, line_numbers):
+    apply(file_path, {'op': 'delete', 'lines': sorted(set(line_numbers))})
+
+
+def compact(file_path):
+    journal.compact(file_path)
@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+
+from sidecar import sidecar_path, atomic_write
+
+# Each project keeps a small summary of its todos file in
+# .todoscript/summary.json: task counts, tag counts and the signature of the
+# file it describes. Mutations adjust it in place from the lines they
+# touched; a summary whose signature no longer matches the file is rebuilt
+# from a full read the next time it is asked for.
+
+SUMMARY_NAME = 'summary.json'
+
+# path -> summary, so repeated reports skip re-reading the json
+_summaries = {}
+_summaries_lock = threading.Lock()
+
+
+def summary_path(file_path, create=False):
+    return sidecar_path(file_path, SUMMARY_NAME, create)
+
+
+def empty_summary():
+    return {'completed': 0, 'pending': 0, 'total': 0, 'lines': 0, 'tags': {}}
+
+
+def count_line(summary, raw, sign):
+    marker = raw[:3]
+
+    if marker == '[x]':
+        summary['completed'] += sign
+        summary['total'] += sign
+    elif marker == '[ ]':
+        summary['pending'] += sign
+        summary['total'] += sign
+
+    summary['lines'] += sign
+
+    tags = summary['tags']
+    for tag in {word for word in raw.split() if word.startswith('@')}:
+        count = tags.get(tag, 0) + sign
+        if count > 0:
+            tags[tag] = count
+        else:
+            tags.pop(tag, None)
+
+
+def summarize(lines):
+    summary = empty_summary()
+    for raw in lines:
+        count_line(summary, raw, 1)
+
+    return summary
+
+
+def read_summary(file_path):
+    path = os.path.abspath(file_path)
+
+    with _summaries_lock:
+        cached = _summaries.get(path)
+    if cached is not None:
+        return cached
+
+    try:
+        with open(summary_path(file_path), encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_summary(file_path, summary, signature):
+    summary = {**summary, 'signature': list(signature), 'modified': signature[0]}
+
+    atomic_write(summary_path(file_path, create=True),
+                 lambda file: json.dump(summary, file))
+
+    with _summaries_lock:
+        _summaries[os.path.abspath(file_path)] = summary
+
+    return summary
+
+
+def get_summary(file_path):
+    '''
+        Returns the summary for a todos file, rebuilding it when the file
+        changed behind our back. Raises FileNotFoundError for missing files.
+    '''
+    from journal import get_lock
+    from store import stat_signature, read_text
+
+    summary = read_summary(file_path)
+    if summary is not None and summary.get('signature') == list(stat_signature(file_path)):
+        return summary
+
+    with get_lock(file_path):
+        signature = stat_signature(file_path)
+        lines, _ = read_text(file_path)
+        return write_summary(file_path, summarize(lines), signature)
+
+
+def update(file_path, before, changes):
+    '''
+        Applies (old, new) raw line pairs to the summary saved for signature
+        before, and stamps it with the file's current signature. Either side
+        of a pair may be None for added or deleted lines. Does nothing when
+        there is no summary for before or changes is None; the summary is
+        then rebuilt lazily.
+    '''
+    from store import stat_signature
+
+    if before is None or changes is None:
+        return
+
+    summary = read_summary(file_path)
+    if summary is None or summary.get('signature') != list(before):
+        return
+
+    summary = {**summary, 'tags': dict(summary['tags'])}
+    for old, new in changes:
+        if old is not None:
+            count_line(summary, old, -1)
+        if new is not None:
+            count_line(summary, new, 1)
+
+    write_summary(file_path, summary, stat_signature(file_path))
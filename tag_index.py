@@ -0,0 +1,79 @@
+from workspace_index import WorkspaceIndex, get_index
+
+
+class TagIndex(WorkspaceIndex):
+    '''
+        Inverted index of tag -> {project: [line numbers]} over the workspace.
+    '''
+
+    name = 'tags'
+
+    def reset(self):
+        self.postings = {}
+        self.project_tags = {}
+
+    def add_project(self, project, tasks):
+        tags = set()
+
+        for task in tasks:
+            for tag in task.tags:
+                lines = self.postings.setdefault(tag, {}).setdefault(project, [])
+                if not lines or lines[-1] != task.line:
+                    lines.append(task.line)
+                tags.add(tag)
+
+        self.project_tags[project] = sorted(tags)
+
+    def remove_project(self, project):
+        for tag in self.project_tags.pop(project, []):
+            projects = self.postings.get(tag)
+            if projects is None:
+                continue
+
+            projects.pop(project, None)
+            if not projects:
+                del self.postings[tag]
+
+    def to_data(self):
+        return self.postings
+
+    def load_data(self, data):
+        self.postings = data
+        self.project_tags = {}
+
+        for tag, projects in data.items():
+            for project in projects:
+                self.project_tags.setdefault(project, []).append(tag)
+
+    # queries
+
+    def tags(self):
+        return sorted(self.postings)
+
+    def counts(self):
+        return {tag: sum(len(lines) for lines in projects.values())
+                for tag, projects in sorted(self.postings.items())}
+
+    def lookup(self, tag):
+        '''
+            Returns [(project, line)] for every task tagged with tag.
+        '''
+        return [(project, line)
+                for project, lines in sorted(self.postings.get(tag, {}).items())
+                for line in lines]
+
+    def project_postings(self, tag):
+        '''
+            Returns [(project, [line numbers])] for tag, sorted by project.
+        '''
+        return sorted(self.postings.get(tag, {}).items())
+
+    def projects(self, tag):
+        return set(self.postings.get(tag, {}))
+
+    def project_lines(self, tag, project):
+        return self.postings.get(tag, {}).get(project, [])
+
+
+def get_tag_index(parent_folder):
+    return get_index(TagIndex, parent_folder)
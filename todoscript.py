@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+'''
+    Headless entry point for scripts, cron jobs and git hooks.
+
+    Running without a command starts the interactive menus. Only the
+    interactive path imports InquirerPy/rich/yaspin.
+'''
+
+import argparse
+import os
+import sys
+
+from utils import get_configuration
+
+
+def get_parent_folder():
+    config = get_configuration()
+    if config is None:
+        sys.exit("todoscript has not been configured. Run it without arguments first.")
+
+    return config['parent_folder_name']
+
+
+def project_file(project):
+    from store import find_tasks_file
+
+    folder_path = os.path.join(get_parent_folder(), project)
+    if not os.path.isdir(folder_path):
+        sys.exit(f"Unknown project: {project}")
+
+    return find_tasks_file(folder_path)
+
+
+def command_add(args):
+    from store import add_task
+
+    add_task(project_file(args.project), ' '.join(args.text), args.done)
+
+
+def command_status(args):
+    from store import set_status
+
+    set_status(project_file(args.project), args.indices, args.command == 'done')
+
+
+def command_show(args):
+    from store import read_task
+
+    try:
+        print(read_task(project_file(args.project), args.index).raw)
+    except IndexError as e:
+        sys.exit(str(e))
+
+
+def command_edit(args):
+    from store import read_task, edit_task
+
+    file_path = project_file(args.project)
+    try:
+        task = read_task(file_path, args.index)
+    except IndexError as e:
+        sys.exit(str(e))
+
+    status = task.raw[:3] if task.is_task else '[ ]'
+    edit_task(file_path, args.index, f"{status} {' '.join(args.text)}")
+
+
+def command_delete(args):
+    from store import delete_tasks
+
+    delete_tasks(project_file(args.project), args.indices)
+
+
+def command_list(args):
+    from store import get_store
+
+    store = get_store(project_file(args.project))
+
+    try:
+        tasks = store.filter(args.filter)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    for task in tasks:
+        print(f"{task.line}. {task.raw}")
+
+
+def command_report(args):
+    from reports import collect_reports
+    from store import list_projects
+
+    parent_folder = get_parent_folder()
+    reports_data = collect_reports(list_projects(parent_folder), parent_folder)
+
+    for data in reports_data:
+        print(f"{data['project']}\t{data['completed_tasks']}/{data['total_tasks']}")
+
+    if args.format:
+        from utils import generate_reports
+
+        # the table is only built if an html/svg export needs it
+        generate_reports(reports_data, None, args.format.split(','))
+
+
+def command_tags(args):
+    from store import read_tasks
+    from tag_index import get_tag_index
+
+    parent_folder = get_parent_folder()
+    tag_index = get_tag_index(parent_folder)
+
+    if not args.tag:
+        for tag, count in tag_index.counts().items():
+            print(f"{tag}\t{count}")
+        return
+
+    tag = args.tag if args.tag.startswith('@') else f'@{args.tag}'
+    for project, lines in tag_index.project_postings(tag):
+        for task in read_tasks(project_file(project), lines):
+            print(f"{project}:{task.line}\t{task.raw}")
+
+
+def command_search(args):
+    from search import get_search_index
+
+    results = get_search_index(get_parent_folder()).search(' '.join(args.query), args.limit)
+
+    for score, project, line, raw in results:
+        print(f"{project}:{line}\t{raw}")
+
+
+def command_due(args):
+    from due_index import get_due_index
+
+    due_index = get_due_index(get_parent_folder())
+
+    # overdue tasks come first and upcoming ones fill the rest of the limit
+    results = due_index.overdue()[:args.limit]
+    if not args.overdue and len(results) < args.limit:
+        results += due_index.upcoming(args.limit - len(results))
+
+    for due, project, line, raw in results:
+        print(f"{project}:{line}\t{due}\t{raw}")
+
+
+def command_priority(args):
+    from priority_index import get_priority_index
+    from store import parse_priority
+
+    priority_index = get_priority_index(get_parent_folder())
+    priority = parse_priority(f'!{args.level}') if args.level else None
+    if args.level and priority is None:
+        sys.exit(f"Unknown priority: {args.level}")
+
+    if args.project:
+        project_file(args.project)
+        results = [(level, args.project, line, raw)
+                   for level, line, raw in priority_index.entries(args.project, priority)[:args.limit]]
+    else:
+        results = priority_index.top(args.limit, priority)
+
+    for level, project, line, raw in results:
+        print(f"{project}:{line}\t!{level}\t{raw}")
+
+
+def command_query(args):
+    import itertools
+    from query import run_query
+
+    if not args.query:
+        sys.exit("Missing query.")
+
+    parent_folder = get_parent_folder()
+    projects = None
+    if args.project:
+        project_file(args.project)
+        projects = [args.project]
+
+    # a single argument is a whole query, several are terms already split by the shell
+    query = args.query[0] if len(args.query) == 1 else args.query
+
+    try:
+        results = run_query(parent_folder, query, projects)
+        for project, task in itertools.islice(results, args.limit):
+            print(f"{project}:{task.line}\t{task.raw}")
+    except ValueError as e:
+        sys.exit(str(e))
+
+
+def command_import(args):
+    from discovery import discover
+    from harvest import harvest
+    from store import list_projects
+
+    config = get_configuration()
+    parent_folder = get_parent_folder()
+
+    sources = discover(config)
+
+    for project in args.projects or list_projects(parent_folder):
+        source_folder = sources.get(project, os.path.join(config['root_folder'], project))
+        if not os.path.isdir(source_folder):
+            continue
+
+        imported = harvest(source_folder, project_file(project),
+                           ignored=[parent_folder], max_workers=args.workers)
+        print(f"{project}\t{imported} imported")
+
+
+def command_migrate(args):
+    import sqlite_store
+    from store import get_storage_mode
+
+    parent_folder = get_parent_folder()
+
+    # journal storage keeps its tasks in the todos files too
+    if (get_storage_mode() == 'sqlite') == (args.to == 'sqlite'):
+        sys.exit(f"Storage is already {args.to}.")
+
+    try:
+        if args.to == 'sqlite':
+            migrated = sqlite_store.migrate_to_sqlite(parent_folder, args.force)
+        else:
+            migrated = sqlite_store.migrate_to_text(parent_folder, args.force)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    print(f"Migrated {migrated} projects to {args.to} storage")
+
+
+def command_export(args):
+    from exporter import WRITERS, export_lines, export_project, exports_folder, iter_lines
+
+    export_formats = [format for format in args.format.split(',') if format]
+    unknown = [format for format in export_formats if format not in WRITERS]
+    if unknown or not export_formats:
+        sys.exit(f"Unknown export format: {', '.join(unknown) or args.format}")
+    if len(args.delimiter) != 1:
+        sys.exit("The delimiter must be a single character.")
+
+    file_path = project_file(args.project)
+
+    if args.output == '-':
+        if len(export_formats) > 1:
+            sys.exit("Only one format can be written to stdout.")
+
+        export_lines(iter_lines(file_path), [(export_formats[0], sys.stdout)], args.project, args.delimiter)
+        return
+
+    output_folder = args.output or exports_folder(get_parent_folder(), args.project)
+    for path in export_project(file_path, args.project, export_formats, output_folder, args.delimiter).values():
+        print(path)
+
+
+def command_export_all(args):
+    from exporter import WRITERS, bulk_export
+
+    export_formats = [format for format in args.format.split(',') if format]
+    unknown = [format for format in export_formats if format not in WRITERS]
+    if unknown or not export_formats:
+        sys.exit(f"Unknown export format: {', '.join(unknown) or args.format}")
+    if len(args.delimiter) != 1:
+        sys.exit("The delimiter must be a single character.")
+
+    stats = bulk_export(get_parent_folder(), export_formats, args.output, args.delimiter,
+                        args.workers, args.force)
+
+    elapsed = stats['elapsed'] or 1e-9
+    megabytes_read = stats['bytes_read'] / 1024 / 1024
+    megabytes_written = stats['bytes_written'] / 1024 / 1024
+
+    print(f"{stats['exported']} exported, {stats['skipped']} unchanged, {stats['failed']} failed "
+          f"in {elapsed:.2f}s")
+    print(f"{stats['exported'] / elapsed:.1f} projects/s, {megabytes_read / elapsed:.1f} MB/s read, "
+          f"{megabytes_written / elapsed:.1f} MB/s written")
+
+    if stats['failed']:
+        sys.exit(1)
+
+
+def command_scaffold(args):
+    from main import create_tasks
+
+    get_parent_folder()
+    create_tasks(args.dry_run, args.workers)
+
+
+def command_tui(args):
+    from tui import run
+
+    run(get_parent_folder())
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='todoscript', description='Manage project TODOs without the interactive menus.')
+    subparsers = parser.add_subparsers(dest='command')
+
+    add_parser = subparsers.add_parser('add', help='add a task to a project')
+    add_parser.add_argument('project')
+    add_parser.add_argument('text', nargs='+')
+    add_parser.add_argument('--done', action='store_true',
+                            help='add the task as completed')
+    add_parser.set_defaults(handler=command_add)
+
+    for name, help_text in (('done', 'mark tasks as complete'), ('undo', 'mark tasks as incomplete')):
+        status_parser = subparsers.add_parser(name, help=help_text)
+        status_parser.add_argument('project')
+        status_parser.add_argument('indices', nargs='+', type=int)
+        status_parser.set_defaults(handler=command_status)
+
+    show_parser = subparsers.add_parser('show', help='print a single task')
+    show_parser.add_argument('project')
+    show_parser.add_argument('index', type=int)
+    show_parser.set_defaults(handler=command_show)
+
+    edit_parser = subparsers.add_parser('edit', help="replace a task's text")
+    edit_parser.add_argument('project')
+    edit_parser.add_argument('index', type=int)
+    edit_parser.add_argument('text', nargs='+')
+    edit_parser.set_defaults(handler=command_edit)
+
+    delete_parser = subparsers.add_parser('delete', help='delete tasks')
+    delete_parser.add_argument('project')
+    delete_parser.add_argument('indices', nargs='+', type=int)
+    delete_parser.set_defaults(handler=command_delete)
+
+    list_parser = subparsers.add_parser('list', help="list a project's tasks")
+    list_parser.add_argument('project')
+    list_parser.add_argument('--filter', default='',
+                             help='all, completed, pending, a @tag, a !priority or a query')
+    list_parser.set_defaults(handler=command_list)
+
+    report_parser = subparsers.add_parser('report', help='print task counts for every project')
+    report_parser.add_argument('--format', default='',
+                               help='comma-separated report formats to export (csv,json,html,svg)')
+    report_parser.set_defaults(handler=command_report)
+
+    tags_parser = subparsers.add_parser('tags', help='list tags, or the tasks carrying a tag across all projects')
+    tags_parser.add_argument('tag', nargs='?')
+    tags_parser.set_defaults(handler=command_tags)
+
+    search_parser = subparsers.add_parser('search', help='search task text across all projects')
+    search_parser.add_argument('query', nargs='+')
+    search_parser.add_argument('--limit', type=int, default=20)
+    search_parser.set_defaults(handler=command_search)
+
+    due_parser = subparsers.add_parser('due', help='list overdue tasks and the next tasks due across all projects')
+    due_parser.add_argument('--limit', type=int, default=20,
+                            help='most tasks to list, overdue ones first')
+    due_parser.add_argument('--overdue', action='store_true',
+                            help='only list overdue tasks')
+    due_parser.set_defaults(handler=command_due)
+
+    priority_parser = subparsers.add_parser('priority', help='list the highest-priority pending tasks')
+    priority_parser.add_argument('project', nargs='?', help='defaults to every project')
+    priority_parser.add_argument('--limit', type=int, default=20)
+    priority_parser.add_argument('--level', default=None,
+                                 help='only this priority: high, medium, low or 1-9')
+    priority_parser.set_defaults(handler=command_priority)
+
+    query_parser = subparsers.add_parser(
+        'query', help='list tasks matching a query, e.g. status:pending tag:@api -tag:@blocked project:svc-*')
+    query_parser.add_argument('query', nargs='*')
+    query_parser.add_argument('--project', default=None, help='only query this project')
+    query_parser.add_argument('--limit', type=int, default=None)
+    query_parser.set_defaults(handler=command_query)
+
+    import_parser = subparsers.add_parser('import', help='import TODO/FIXME comments from project sources')
+    import_parser.add_argument('projects', nargs='*', help='defaults to every project')
+    import_parser.add_argument('--workers', type=int, default=None)
+    import_parser.set_defaults(handler=command_import)
+
+    migrate_parser = subparsers.add_parser('migrate', help='move tasks between the text and SQLite storage backends')
+    migrate_parser.add_argument('--to', required=True, choices=['sqlite', 'text'])
+    migrate_parser.add_argument('--force', action='store_true',
+                                help='replace tasks that are already in the target backend')
+    migrate_parser.set_defaults(handler=command_migrate)
+
+    export_parser = subparsers.add_parser('export', help="export a project's tasks")
+    export_parser.add_argument('project')
+    export_parser.add_argument('--format', default='md',
+                               help='comma-separated formats: csv,json,ndjson,yaml,md,html')
+    export_parser.add_argument('--delimiter', default=',')
+    export_parser.add_argument('--output', '-o', default=None,
+                               help="folder to write to, or - for stdout (default: the project's exports folder)")
+    export_parser.set_defaults(handler=command_export)
+
+    export_all_parser = subparsers.add_parser(
+        'export-all', help='export every project, skipping projects unchanged since the last run')
+    export_all_parser.add_argument('--format', default='md',
+                                   help='comma-separated formats: csv,json,ndjson,yaml,md,html')
+    export_all_parser.add_argument('--delimiter', default=',')
+    export_all_parser.add_argument('--output', '-o', default=None,
+                                   help="folder to write <project>/ exports to (default: each project's exports folder)")
+    export_all_parser.add_argument('--workers', type=int, default=None,
+                                   help='export processes (default: one per CPU)')
+    export_all_parser.add_argument('--force', action='store_true',
+                                   help='export unchanged projects too')
+    export_all_parser.set_defaults(handler=command_export_all)
+
+    scaffold_parser = subparsers.add_parser(
+        'scaffold', help='create TODOs folders and todos files for newly discovered projects')
+    scaffold_parser.add_argument('--dry-run', action='store_true',
+                                 help='print the projects that would be created and exit')
+    scaffold_parser.add_argument('--workers', type=int, default=None)
+    scaffold_parser.set_defaults(handler=command_scaffold)
+
+    tui_parser = subparsers.add_parser('tui', help='open the full-screen task view')
+    tui_parser.set_defaults(handler=command_tui)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+
+    # negated query terms such as -tag:@blocked look like options to argparse
+    if args.command == 'query':
+        args.query += extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    if args.command is None:
+        import cli
+        cli.main()
+        return
+
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
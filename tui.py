@@ -0,0 +1,372 @@
+import os
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.application.current import get_app
+from prompt_toolkit.filters import Condition
+from prompt_toolkit.key_binding import KeyBindings
+from prompt_toolkit.layout import Layout, HSplit, VSplit, Window, ConditionalContainer
+from prompt_toolkit.layout.controls import FormattedTextControl
+from prompt_toolkit.layout.dimension import Dimension
+from prompt_toolkit.styles import Style
+from prompt_toolkit.widgets import TextArea
+
+from pager import TAG_PATTERN
+from reports import collect_reports
+from store import get_store, find_tasks_file, list_projects, stat_signature, add_task, set_status, edit_task, delete_tasks
+
+# Full-screen session: one long-lived prompt_toolkit application that keeps
+# the workspace state in memory. Each pane's fragments are cached until the
+# state they depend on changes, and prompt_toolkit only repaints the screen
+# cells that differ from the previous frame.
+
+# rows used by the title, pane borders, input line and status bar
+CHROME_ROWS = 4
+
+FILTERS = ['', 'pending', 'completed']
+
+KEY_HELP = ("tab switch  ↑↓ move  enter open  space toggle  a add  e edit  d delete  "
+            "f filter  r reports  q quit")
+
+STYLE = Style.from_dict({
+    'title': 'bold #EB5B00',
+    'cursor': 'reverse',
+    'selected': 'bold #61afef',
+    'completed': '#6c6c6c',
+    'tag': '#e5c07b',
+    'dim': '#6c6c6c',
+    'status': 'bg:#303030 #abb2bf',
+})
+
+
+def scroll(cursor, top, rows):
+    '''
+        Returns the first visible row that keeps cursor on screen.
+    '''
+    if cursor < top:
+        return cursor
+    if cursor >= top + rows:
+        return cursor - rows + 1
+    return top
+
+
+class Session:
+    '''
+        Workspace state for the full-screen view.
+    '''
+
+    def __init__(self, parent_folder):
+        self.parent_folder = parent_folder
+        self.projects = list_projects(parent_folder)
+        self.project = 0
+        self.project_top = 0
+        self.cursor = 0
+        self.top = 0
+        self.filter = ''
+        self.focus = 'projects'
+        self.view = 'tasks'
+        self.mode = 'browse'
+        self.message = ''
+        self._tasks_key = None
+        self._tasks = []
+        self._fragments = {}
+
+    # data
+
+    def file_path(self):
+        if not self.projects:
+            return None
+
+        try:
+            return find_tasks_file(os.path.join(self.parent_folder, self.projects[self.project]))
+        except (IndexError, FileNotFoundError):
+            return None
+
+    def tasks(self):
+        file_path = self.file_path()
+        if file_path is None:
+            return []
+
+        key = (file_path, stat_signature(file_path), self.filter)
+        if key != self._tasks_key:
+            self._tasks = get_store(file_path).filter(self.filter)
+            self._tasks_key = key
+
+        return self._tasks
+
+    def current_task(self):
+        tasks = self.tasks()
+        return tasks[self.cursor] if tasks else None
+
+    # rendering
+
+    def rows(self):
+        return max(1, get_app().output.get_size().rows - CHROME_ROWS)
+
+    def cached(self, pane, key, build):
+        cached = self._fragments.get(pane)
+        if cached is None or cached[0] != key:
+            cached = self._fragments[pane] = (key, build())
+
+        return cached[1]
+
+    def project_fragments(self):
+        rows = self.rows()
+        self.project_top = scroll(self.project, self.project_top, rows)
+        key = (tuple(self.projects), self.project, self.project_top, rows, self.focus)
+
+        def build():
+            fragments = []
+            visible = self.projects[self.project_top:self.project_top + rows]
+
+            for index, name in enumerate(visible, start=self.project_top):
+                if index == self.project:
+                    style = 'class:cursor' if self.focus == 'projects' else 'class:selected'
+                else:
+                    style = ''
+                fragments.append((style, f" {name} \n"))
+
+            return fragments
+
+        return self.cached('projects', key, build)
+
+    def task_fragments(self):
+        if self.view == 'reports':
+            return self.report_fragments()
+
+        tasks = self.tasks()
+        rows = self.rows()
+        self.cursor = min(self.cursor, max(len(tasks) - 1, 0))
+        self.top = scroll(self.cursor, self.top, rows)
+        key = (self._tasks_key, self.cursor, self.top, rows, self.focus)
+
+        def build():
+            fragments = []
+
+            for index, task in enumerate(tasks[self.top:self.top + rows], start=self.top):
+                selected = index == self.cursor and self.focus == 'tasks'
+                base = 'class:cursor ' if selected else ''
+                text_style = base + ('class:completed' if task.completed else '')
+                status = '✔' if task.completed else '☐'
+
+                fragments.append((base + 'class:dim', f" {task.line:>5}. "))
+                fragments.append((text_style, f"{status} "))
+
+                text = task.raw[3:] if task.is_task else task.raw
+                position = 0
+                for match in TAG_PATTERN.finditer(text):
+                    fragments.append((text_style, text[position:match.start()]))
+                    fragments.append((base + 'class:tag', match.group()))
+                    position = match.end()
+                fragments.append((text_style, text[position:]))
+                fragments.append(('', "\n"))
+
+            if not tasks:
+                fragments.append(('class:dim', " No tasks\n"))
+
+            return fragments
+
+        return self.cached('tasks', key, build)
+
+    def report_fragments(self):
+        def build():
+            fragments = []
+
+            for report in collect_reports(self.projects, self.parent_folder):
+                total = report['total_tasks']
+                done = report['completed_tasks']
+                bars = round(done / total * 10) if total else 0
+
+                fragments.append(('', f" {report['project']:<24} "))
+                fragments.append(('class:selected', '█' * bars))
+                fragments.append(('class:dim', '-' * (10 - bars)))
+                fragments.append(('', f" {done}/{total}\n"))
+
+            return fragments
+
+        # summaries make this cheap, but only rebuild when asked to
+        return self.cached('reports', self.view, build)
+
+    def title_fragments(self):
+        name = self.projects[self.project] if self.projects else 'no projects'
+        tasks = self.tasks()
+        label = self.filter or 'all'
+        return [('class:title', f" todoscript  {name}"),
+                ('class:dim', f"  {len(tasks)} tasks ({label})")]
+
+    def status_fragments(self):
+        return [('class:status', f" {self.message or KEY_HELP} ")]
+
+    # actions
+
+    def move(self, step):
+        self.message = ''
+
+        if self.focus == 'projects':
+            if self.projects:
+                self.project = min(max(self.project + step, 0), len(self.projects) - 1)
+                self.cursor = 0
+                self.top = 0
+        else:
+            self.cursor = min(max(self.cursor + step, 0), max(len(self.tasks()) - 1, 0))
+
+    def run_action(self, action, *args):
+        file_path = self.file_path()
+        if file_path is None:
+            self.message = "This project has no todos file"
+            return
+
+        try:
+            action(file_path, *args)
+        except Exception as e:
+            self.message = f"An error occurred: {e}"
+
+    def toggle(self):
+        task = self.current_task()
+        if task is not None and task.is_task:
+            self.run_action(set_status, [task.line], not task.completed)
+
+    def delete(self):
+        task = self.current_task()
+        if task is not None:
+            self.run_action(delete_tasks, [task.line])
+
+    def submit(self, text):
+        text = text.strip()
+        if not text:
+            return
+
+        if self.mode == 'add':
+            self.run_action(add_task, text)
+        elif self.mode == 'edit':
+            task = self.current_task()
+            if task is not None:
+                line = f"{task.raw[:3]} {text}" if task.is_task else text
+                self.run_action(edit_task, task.line, line)
+
+    def cycle_filter(self):
+        self.filter = FILTERS[(FILTERS.index(self.filter) + 1) % len(FILTERS)]
+        self.cursor = 0
+        self.top = 0
+
+    def toggle_reports(self):
+        self.view = 'tasks' if self.view == 'reports' else 'reports'
+        self._fragments.pop('reports', None)
+
+
+def build_application(session):
+    browsing = Condition(lambda: session.mode == 'browse')
+    editing = Condition(lambda: session.mode != 'browse')
+
+    projects_window = Window(FormattedTextControl(session.project_fragments, focusable=True),
+                             width=Dimension(preferred=28, max=40))
+    tasks_window = Window(FormattedTextControl(session.task_fragments, focusable=True))
+
+    def accept(buffer):
+        session.message = ''
+        session.submit(buffer.text)
+        session.mode = 'browse'
+        get_app().layout.focus(tasks_window)
+        return False
+
+    input_area = TextArea(multiline=False, prompt=' > ', accept_handler=accept)
+
+    root = HSplit([
+        Window(FormattedTextControl(session.title_fragments), height=1),
+        Window(height=1, char='─', style='class:dim'),
+        VSplit([
+            projects_window,
+            Window(width=1, char='│', style='class:dim'),
+            tasks_window,
+        ]),
+        ConditionalContainer(input_area, filter=editing),
+        Window(FormattedTextControl(session.status_fragments), height=1),
+    ])
+
+    bindings = KeyBindings()
+
+    @bindings.add('q', filter=browsing)
+    @bindings.add('c-c')
+    def quit_session(event):
+        event.app.exit()
+
+    @bindings.add('up', filter=browsing)
+    @bindings.add('k', filter=browsing)
+    def move_up(event):
+        session.move(-1)
+
+    @bindings.add('down', filter=browsing)
+    @bindings.add('j', filter=browsing)
+    def move_down(event):
+        session.move(1)
+
+    @bindings.add('pageup', filter=browsing)
+    def page_up(event):
+        session.move(-session.rows())
+
+    @bindings.add('pagedown', filter=browsing)
+    def page_down(event):
+        session.move(session.rows())
+
+    @bindings.add('tab', filter=browsing)
+    @bindings.add('left', filter=browsing)
+    @bindings.add('right', filter=browsing)
+    def switch_pane(event):
+        session.focus = 'tasks' if session.focus == 'projects' else 'projects'
+
+    @bindings.add('enter', filter=browsing)
+    def open_project(event):
+        session.focus = 'tasks'
+        session.view = 'tasks'
+
+    @bindings.add('space', filter=browsing)
+    @bindings.add('x', filter=browsing)
+    def toggle_task(event):
+        session.toggle()
+
+    @bindings.add('d', filter=browsing)
+    def delete_task(event):
+        session.delete()
+
+    @bindings.add('f', filter=browsing)
+    def filter_tasks(event):
+        session.cycle_filter()
+
+    @bindings.add('r', filter=browsing)
+    def view_reports(event):
+        session.toggle_reports()
+
+    @bindings.add('a', filter=browsing)
+    def start_add(event):
+        session.mode = 'add'
+        session.message = "New task (enter to save, esc to cancel)"
+        input_area.text = ''
+        event.app.layout.focus(input_area)
+
+    @bindings.add('e', filter=browsing)
+    def start_edit(event):
+        task = session.current_task()
+        if task is None:
+            return
+
+        session.mode = 'edit'
+        session.message = f"Edit task {task.line} (enter to save, esc to cancel)"
+        input_area.text = (task.raw[3:] if task.is_task else task.raw).strip()
+        input_area.buffer.cursor_position = len(input_area.text)
+        event.app.layout.focus(input_area)
+
+    @bindings.add('escape', filter=editing)
+    def cancel_input(event):
+        session.mode = 'browse'
+        session.message = ''
+        event.app.layout.focus(tasks_window)
+
+    return Application(
+        layout=Layout(root, focused_element=tasks_window),
+        key_bindings=bindings,
+        style=STYLE,
+        full_screen=True,
+    )
+
+
+def run(parent_folder):
+    build_application(Session(parent_folder)).run()
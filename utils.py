@@ -1,59 +1,190 @@
 import os.path
+import html
+import io
 import json
-from rich.console import Console
-import webbrowser
 import time
-from yaspin import yaspin
 import os
 import subprocess
+from contextlib import contextmanager
+from config import CONFIG_FILE, load_configuration
 
-console = Console(record=True)
+# rich is only imported by the paths that print through it
+_console = None
+
+
+def get_console():
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+
+    return _console
 
 # helper functions
 
 
 def has_been_configured():
-    file_name = './config.json'
+    return os.path.isfile(CONFIG_FILE)
 
-    if os.path.isfile(file_name):
+
+def is_configuration_present(configuration):
+    data = get_configuration()
+
+    if data is None or data.get(configuration) is None:
+        return False
+    else:
         return True
+
+
+def linebreak(): return print(" ")
+
+
+def clear_terminal():
+    # the Windows console only understands ANSI once VT processing is
+    # enabled, so it keeps cls; everywhere else ANSI clear + home avoids
+    # spawning a shell
+    if os.name == 'nt':
+        os.system('cls')
     else:
+        print("\033[2J\033[H", end='', flush=True)
+
+
+def get_configuration():
+    return load_configuration()
+
+
+# fast mode
+
+
+def is_fast_mode():
+    '''
+        Fast mode turns off cosmetic delays and spinners. It is enabled with
+        the TODOSCRIPT_FAST environment variable or "fast_mode" in config.json.
+    '''
+    env_value = os.environ.get('TODOSCRIPT_FAST')
+    if env_value is not None:
+        return env_value.lower() in ('1', 'true', 'yes', 'on')
+
+    config = get_configuration()
+    return bool(config and config.get('fast_mode'))
+
+
+def pause(seconds):
+    if not is_fast_mode():
+        time.sleep(seconds)
+
+
+class QuietSpinner:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
         return False
 
+    def write(self, text):
+        print(text)
 
-def is_configuration_present(configuration):
-    if has_been_configured:
-        with open('config.json', 'r') as file:
-            data = json.load(file)
 
-            if (data.get(configuration) is None):
-                return False
-            else:
-                return True
+def spinner(text, color='light_magenta'):
+    if is_fast_mode():
+        return QuietSpinner()
 
+    from yaspin import yaspin
+    return yaspin(text=text, color=color)
 
-def linebreak(): return print(" ")
 
+@contextmanager
+def progress_bar(description, total):
+    '''
+        Yields advance(step=1) for one aggregated progress bar. In fast mode
+        nothing is drawn.
+    '''
+    if is_fast_mode():
+        yield lambda step=1: None
+        return
 
-def clear_terminal(): return os.system('cls||clear')
+    from rich.progress import Progress
 
+    with Progress(console=get_console()) as progress:
+        task = progress.add_task(description, total=total)
+        yield lambda step=1: progress.advance(task, step)
 
-def get_configuration():
-    if has_been_configured():
-        with open('config.json', 'r') as file:
-            data = json.load(file)
 
-            return data
-    else:
-        return None
+@contextmanager
+def timed(label):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        print(f"{label} in {elapsed:.3f}s")
 
 
 # export utils
 
 
+# above this many rows the html report is streamed instead of rendered by rich
+STREAM_HTML_ROWS = 1000
+
+REPORT_HTML_STYLE = ("<style>body{font-family: monospace; background: #0c0c0c; color: #e5e5e5}"
+                     "table{border-collapse: collapse} th, td{padding: 2px 12px; text-align: left}"
+                     "th{color: #e5e5e5; border-bottom: 1px solid #626262} .id{color: #61d6d6; text-align: center}"
+                     ".folder, .progress{color: #e5c07b} .bar{color: #ffffff}</style>")
+
+
 def generate_reports(reports_data, table, formats):
-    if "html" in formats or 'svg' in formats:
-        console.print(table)
+    with timed(f"Exported {len(formats)} report formats"):
+        write_reports(reports_data, table, formats)
+
+
+def record_table(table):
+    '''
+        Prints table into a recording console of its own, so an export only
+        ever contains this table and the buffer is freed with the console.
+    '''
+    from rich.console import Console
+
+    recorder = Console(record=True, file=io.StringIO(), width=get_console().width)
+    recorder.print(table)
+    return recorder
+
+
+def stream_reports_html(reports_data, file_path):
+    '''
+        Writes the reports table as html row by row, without holding a
+        rendered copy of the table in memory.
+    '''
+    from reports import progress_percentage
+
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write(f"<!DOCTYPE html><html><head><meta charset=\"UTF-8\">{REPORT_HTML_STYLE}</head><body>\n")
+        file.write("<table><caption>Tasks</caption>"
+                   "<tr><th>ID</th><th>Folder</th><th>Progress</th></tr>\n")
+
+        for data in reports_data:
+            completed = data['completed_tasks']
+            total = data['total_tasks']
+            percentage = progress_percentage(completed, total)
+            bars = int(percentage / 10)
+
+            file.write(
+                f"<tr><td class=\"id\">{data['id']}</td>"
+                f"<td class=\"folder\">{html.escape(data['project'])}</td>"
+                f"<td class=\"progress\">[<span class=\"bar\">{'█' * bars}</span>{'-' * (10 - bars)}] "
+                f"{percentage}% ({completed}/{total})</td></tr>\n")
+
+        file.write("</table></body></html>\n")
+
+
+def write_reports(reports_data, table, formats):
+    console = get_console()
+
+    recorder = None
+    if 'svg' in formats or ('html' in formats and len(reports_data) <= STREAM_HTML_ROWS):
+        if table is None:
+            from reports import build_table
+            table = build_table(reports_data)
+        recorder = record_table(table)
 
     reports_folder = 'reports'
     os.makedirs(reports_folder, exist_ok=True)
@@ -65,33 +196,34 @@ def generate_reports(reports_data, table, formats):
 
     for format in formats:
         if format == 'html':
-            html_file = 'reports_table.html'
-
-            html = console.export_html(clear=False)
+            html_file = os.path.join(reports_folder, 'reports_table.html')
 
-            with open(os.path.join(reports_folder, html_file), 'w') as file:
-                file.write(html)
+            if len(reports_data) > STREAM_HTML_ROWS:
+                stream_reports_html(reports_data, html_file)
+            else:
+                with open(html_file, 'w', encoding='utf-8') as file:
+                    file.write(recorder.export_html(clear=False))
 
         if format == 'svg':
             svg_file = 'reports_table.svg'
 
-            svg = console.export_svg(clear=False)
+            svg = recorder.export_svg(clear=False)
 
-            with open(os.path.join(reports_folder, svg_file), 'w') as file:
+            with open(os.path.join(reports_folder, svg_file), 'w', encoding='utf-8') as file:
                 file.write(svg)
 
         if format == 'csv':
 
             cols = 'Index,Folder,Completed tasks,Pending tasks,Total tasks'
 
-            with open(os.path.join(reports_folder, 'reports.csv'), 'w') as file:
+            with open(os.path.join(reports_folder, 'reports.csv'), 'w', encoding='utf-8') as file:
                 file.write(f"{cols}\n")
                 for data in reports_data:
                     file.write(
                         f"{data['id']},{data['project']},{data['completed_tasks']},{data['pending_tasks']},{data['total_tasks']}\n")
 
         if format == 'json':
-            with open(os.path.join(reports_folder, 'reports.json'), 'w') as file:
+            with open(os.path.join(reports_folder, 'reports.json'), 'w', encoding='utf-8') as file:
                 file.write("[\n")
                 for index, data in enumerate(reports_data):
                     if index == len(reports_data) - 1:
@@ -101,6 +233,11 @@ def generate_reports(reports_data, table, formats):
                 file.write("]\n")
 
     linebreak()
+    if is_fast_mode():
+        for task in tasks:
+            console.log(f"{task} complete")
+        return
+
     with console.status("[bold bright_magenta]Generating reports...") as status:
         while tasks:
             task = tasks.pop(0)
@@ -108,105 +245,6 @@ def generate_reports(reports_data, table, formats):
             console.log(f"{task} complete")
 
 
-def export_tasks(folder, tasks, format, delimiter=','):
-    '''
-        md,json,html,csv
-    '''
-
-    config = get_configuration()
-    tasks_folder = config['parent_folder_name']
-
-    exports_folder = 'exports'
-    exports_folder_path = os.path.join(tasks_folder, folder,
-                                       exports_folder)
-    if os.path.exists(exports_folder_path):
-        pass
-    else:
-        os.makedirs(exports_folder_path, exist_ok=True)
-
-    linebreak()
-
-    tasks_list = []
-
-    def get_tags(task):
-        return list(set(f'{tag[1:]}' for tag in task.split(" ") if tag.startswith("@")))
-
-    def get_task_without_tags(task):
-        return ' '.join(word for word in task.split(' ') if not word.startswith('@'))
-
-    for index, task in enumerate(tasks):
-        tasks_list.append({
-            'id': index,
-            'task': get_task_without_tags(task[3:]),
-            'status': 'Complete' if task[:3] == '[x]' else "Incomplete",
-            'tags': get_tags(task)
-        })
-
-
-    if format == 'csv':
-        with open(os.path.join(exports_folder_path, 'exported_tasks.csv'), 'w') as file:
-            file.write(f"ID{delimiter}Task{delimiter}Tags{delimiter}Status\n")
-            for index, task in enumerate(tasks):
-                tags = get_tags(task)
-                line_without_tags = get_task_without_tags(task)
-
-                file.write(
-                    f'{index+1}{delimiter}{line_without_tags}{delimiter}{" | ".join(tags)}{delimiter}{"completed" if task[:3] == "[x]" else "pending"}\n')
-            console.print(
-                f" [bright_magenta]✔ Successfully generated exported_tasks.csv")
-
-    if format == 'json':
-        with open(os.path.join(exports_folder_path, 'exported_tasks.json'), 'w') as file:
-            file.write("[\n")
-            for index, task in enumerate(tasks_list):
-           
-                if index == len(tasks_list) - 1:
-                    file.write(f"{json.dumps(task)}")
-                else:
-                    file.write(f"{json.dumps(task)},\n")
-
-            file.write("]\n")
-            console.print(f" [bright_magenta]✔ Successfully generated exported_tasks.json")
-
-    if format == 'html':
-        html_style = "<style>body{font-family: 'Inter' }#tags_container{display: flex; flex-wrap: wrap; gap: 10px;} .tag{color: #d50dd5; font-weight: 600;} .task{display:flex; gap:10px; align-items: center}</style>"
-        linked_styles = '<link rel="preconnect" href="https://fonts.googleapis.com"><link rel="preconnect" href="https://fonts.gstatic.com" crossorigin><link href="https://fonts.googleapis.com/css2?family=Inter:ital,opsz,wght@0,14..32,100..900;1,14..32,100..900&display=swap" rel="stylesheet">'
-        with open(os.path.join(exports_folder_path, 'exported_tasks.html'), 'w') as file:
-            file.write(f"<html><head>{html_style}{linked_styles}</head><body><h1>{folder} tasks</h1><main>\n")
-            for index, task in enumerate(tasks_list):
-                tags = task['tags']
-
-                tags_html = [f"<span class='tag'>@{tag}</span>" for tag in tags]
-
-                file.write(
-                    f'<div class="task"><input type="checkbox" id="task-{index}" {"checked" if task["status"] == "Complete" else ""}><label for="task-{index}">{task["task"]}</label> <div id="tags_container">{",".join(tags_html)}</div></div>'
-                )
-            file.write("</main></body></html>\n")
-            console.print(f" [bright_magenta]✔ Successfully generated exported_tasks.html")
-
-    if format == 'yaml':
-        with open(os.path.join(exports_folder_path, 'exported_tasks.yaml'), 'w') as file:
-            file.write("tasks:\n")
-            for (index, task) in enumerate(tasks_list):
-                tags = task['tags']
-                file.write(
-                    f"- id: {index}\n"
-                    f"  task: {task['task']}\n"
-                    f"  status: {task['status']}\n"
-                    f"  tags: {' | '.join(tags)}\n"
-                )
-            console.print(f" [bright_magenta]✔ Successfully generated exported_tasks.yaml")
-
-    if format == 'md':
-        with (open(os.path.join(exports_folder_path, 'exported_tasks.md'), 'w')) as file:
-            file.write("## Tasks \n")
-
-            for (index, line) in enumerate(tasks):
-                file.write(f'- {line}. \n')
-
-            console.print(f" [bright_magenta]✔ Successfully generated exported_tasks.md")
-
-
 def open_file(exports_folder_path):
     try:
         if os.name == 'posix':
@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+
+from sidecar import workspace_path, atomic_write
+from store import TaskStore, find_tasks_file, list_projects, stat_signature
+
+
+class WorkspaceIndex(ABC):
+    '''
+        Base class for indexes over every project in the TODOs folder.
+
+        The index is persisted under <parent>/.todoscript/ together with the
+        stat signature of each project's todos file. refresh() re-parses only
+        the projects whose signature changed; subclasses implement
+        add_project/remove_project and the to_data/load_data pair.
+    '''
+
+    name = None
+    version = 1
+
+    def __init__(self, parent_folder):
+        self.parent_folder = parent_folder
+        self.signatures = {}
+        self.lock = threading.RLock()
+        self.reset()
+        self.load()
+
+    @property
+    def path(self):
+        return workspace_path(self.parent_folder, f'{self.name}.json')
+
+    # subclass hooks
+
+    @abstractmethod
+    def reset(self):
+        pass
+
+    @abstractmethod
+    def add_project(self, project, tasks):
+        pass
+
+    @abstractmethod
+    def remove_project(self, project):
+        pass
+
+    @abstractmethod
+    def to_data(self):
+        pass
+
+    @abstractmethod
+    def load_data(self, data):
+        pass
+
+    # persistence
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                stored = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        if stored.get('version') != self.version:
+            return
+
+        self.signatures = {project: tuple(signature)
+                           for project, signature in stored['signatures'].items()}
+        self.load_data(stored['data'])
+
+    def save(self):
+        stored = {
+            'version': self.version,
+            'signatures': self.signatures,
+            'data': self.to_data()
+        }
+
+        path = workspace_path(self.parent_folder, f'{self.name}.json', create=True)
+        # json.dumps runs in C, json.dump streams through the pure Python encoder
+        atomic_write(path, lambda file: file.write(json.dumps(stored)))
+
+    # incremental updates
+
+    def refresh(self):
+        with self.lock:
+            changed = False
+            projects = set()
+
+            for project in list_projects(self.parent_folder):
+                try:
+                    file_path = find_tasks_file(os.path.join(self.parent_folder, project))
+                    signature = stat_signature(file_path)
+                except (IndexError, FileNotFoundError):
+                    continue
+
+                projects.add(project)
+
+                if self.signatures.get(project) == signature:
+                    continue
+
+                if project in self.signatures:
+                    self.remove_project(project)
+
+                self.add_project(project, TaskStore(file_path).load().tasks)
+                self.signatures[project] = signature
+                changed = True
+
+            for project in set(self.signatures) - projects:
+                self.remove_project(project)
+                del self.signatures[project]
+                changed = True
+
+            if changed:
+                self.save()
+
+        return self
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(index_class, parent_folder):
+    key = (index_class, os.path.abspath(parent_folder))
+
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = index_class(parent_folder)
+
+    return index.refresh()